@@ -1,24 +1,23 @@
 from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-import copy
+import orjson
 import os
+import llm_cache
 
-def get_llm_data_from_markdown(markdown, prompt=None):
-    """
-    Extracts structured data from markdown.
+# Pooled session with retries for the OpenRouter API
+SESSION = requests.Session()
+_retry = Retry(total=5, backoff_factor=1.0, status_forcelist=[429, 500, 502, 503, 504], respect_retry_after_header=True, allowed_methods=frozenset(["GET", "POST"]))
+_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=_retry)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
 
-    Args:
-        markdown: The markdown text to extract data from.
-        prompt: (Optional) The prompt to use for the LLM. If not provided, a default prompt will be used.
-    Returns:
-        list: A list of additional camps extracted from the markdown.
+PROMPT_VERSION = "v1"
 
-    """
-    snippet = markdown
-    OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-    if not prompt:
-        prompt = f"""
+# Built once at import; only the snippet changes between calls
+_PROMPT_TEMPLATE = """
         You are a structured data extractor. From the following text, extract ONLY the values below and return them in strict JSON format. You are looking for
         information about soccer camps, including the event name, start and end dates, ages, and cost. Only extract data if you
         are confident there is a soccer camp occurring in the near future. Do not return data just because you see the word soccer.
@@ -44,15 +43,34 @@ def get_llm_data_from_markdown(markdown, prompt=None):
         Even if the text does not contain all fields, return an empty string for those fields. Do not return any other text or explanation, just the JSON.
         """
 
+
+def get_llm_data_from_markdown(markdown, prompt=None):
+    """
+    Extracts structured data from markdown.
+
+    Args:
+        markdown: The markdown text to extract data from.
+        prompt: (Optional) The prompt to use for the LLM. If not provided, a default prompt will be used.
+    Returns:
+        list: A list of additional camps extracted from the markdown.
+
+    """
+    snippet = markdown
+    if not prompt:
+        prompt = _PROMPT_TEMPLATE.format(snippet=snippet)
+    # Read the key per call so one set after import (e.g. from a .env loaded later) is picked up
     headers_llm = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
         "Content-Type": "application/json"
     }
+    model = "deepseek/deepseek-r1-0528-qwen3-8b:free"
     payload = {
-        "model": "deepseek/deepseek-r1-0528-qwen3-8b:free",
+        "model": model,
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.2
     }
+    # Key on the full prompt since callers may pass their own
+    cache_key = llm_cache.make_key(PROMPT_VERSION, model, prompt)
 
     addl_camps = []
     camp = {
@@ -66,50 +84,55 @@ def get_llm_data_from_markdown(markdown, prompt=None):
     }
 
     try:
-        llm_resp = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers_llm, data=json.dumps(payload))
-        llm_json = llm_resp.json()
-        print("LLM Response:", llm_json)
-        if "choices" in llm_json and llm_json["choices"]:
-            llm_output = llm_json["choices"][0]["message"]["content"]
-        else:
-            raise ValueError("No 'choices' in LLM response")
-        if llm_output.startswith("```"):
-            llm_output = llm_output.strip("`").strip()
-        json_start = llm_output.find('[')
-        if json_start == -1:
-            raise ValueError("No '[' found in LLM output")
-        json_snippet = llm_output[json_start:]
-        try:
-            parsed = json.loads(json_snippet)
-        except json.JSONDecodeError:
-            raise
-        try:
-            if isinstance(parsed, list) and len(parsed) > 0:
-                camp["Camp Found?"] = "Yes"
-                camp.update({
-                    "Event Details": parsed[0].get("event_name", camp.get("Event Details")),
-                    "start_date": parsed[0].get("start_date", ""),
-                    "end_date": parsed[0].get("end_date", ""),
-                    "Ages / Grade Level": parsed[0].get("ages", ""),
-                    "Cost": parsed[0].get("cost", "")
-                })
-                addl_camps.append(camp)
-                print("Adding camp:", camp["Event Details"], "to the list.")
-                for camp_obj in parsed[1:]:
-                    new_camp = copy.deepcopy(camp)
-                    new_camp.update({
-                        "Event Details": camp_obj.get("event_name", camp.get("Event Details")),
-                        "start_date": camp_obj.get("start_date", ""),
-                        "end_date": camp_obj.get("end_date", ""),
-                        "Ages / Grade Level": camp_obj.get("ages", ""),
-                        "Cost": camp_obj.get("cost", "")
-                    })
-                    addl_camps.append(new_camp)
-                    print("Adding additional camp:", new_camp["Event Details"], "to the list.")
+        parsed = llm_cache.get(cache_key)
+        if parsed is None:
+            llm_resp = SESSION.post("https://openrouter.ai/api/v1/chat/completions", headers=headers_llm, data=orjson.dumps(payload))
+            llm_json = orjson.loads(llm_resp.content)
+            print("LLM Response:", llm_json)
+            if "choices" in llm_json and llm_json["choices"]:
+                llm_output = llm_json["choices"][0]["message"]["content"]
             else:
-                camp["Camp Found?"] = "No"
-        except json.JSONDecodeError:
-            pass
-    except Exception:
+                raise ValueError("No 'choices' in LLM response")
+            if llm_output.startswith("```"):
+                llm_output = llm_output.strip("`").strip()
+            try:
+                # Replies that are bare JSON decode straight away with orjson
+                parsed = orjson.loads(llm_output)
+            except ValueError:
+                # Otherwise decode once from the first '[' or '{', ignoring anything the model appends
+                starts = [i for i in (llm_output.find('['), llm_output.find('{')) if i != -1]
+                if not starts:
+                    raise ValueError("No JSON found in LLM output")
+                parsed, _ = json.JSONDecoder().raw_decode(llm_output, min(starts))
+            if isinstance(parsed, dict):
+                parsed = [parsed] if any(parsed.values()) else []
+            llm_cache.put(cache_key, parsed, model=model)
+        if isinstance(parsed, list) and len(parsed) > 0:
+            camp["Camp Found?"] = "Yes"
+            camp.update({
+                "Event Details": parsed[0].get("event_name", camp.get("Event Details")),
+                "start_date": parsed[0].get("start_date", ""),
+                "end_date": parsed[0].get("end_date", ""),
+                "Ages / Grade Level": parsed[0].get("ages", ""),
+                "Cost": parsed[0].get("cost", "")
+            })
+            addl_camps.append(camp)
+            print("Adding camp:", camp["Event Details"], "to the list.")
+            for camp_obj in parsed[1:]:
+                new_camp = {
+                    "Event Details": camp_obj.get("event_name", camp.get("Event Details")),
+                    "address": camp["address"],
+                    "start_date": camp_obj.get("start_date", ""),
+                    "end_date": camp_obj.get("end_date", ""),
+                    "Ages / Grade Level": camp_obj.get("ages", ""),
+                    "Cost": camp_obj.get("cost", ""),
+                    "Camp Found?": "Yes"
+                }
+                addl_camps.append(new_camp)
+                print("Adding additional camp:", new_camp["Event Details"], "to the list.")
+        else:
+            camp["Camp Found?"] = "No"
+    except (ValueError, KeyError, TypeError, AttributeError):
+        # Only bad LLM output is recorded as an error; request failures surface to the caller
         camp["start_date"] = camp["end_date"] = camp["Ages / Grade Level"] = camp["Cost"] = "LLM Error"
     return addl_camps
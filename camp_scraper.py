@@ -1,8 +1,76 @@
 from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-import copy
+import orjson
 import os
+import re
+import time
+import llm_cache
+
+# One pooled session so every OpenRouter call reuses the same TLS connection
+SESSION = requests.Session()
+_retry = Retry(total=5, backoff_factor=1.0, status_forcelist=[429, 500, 502, 503, 504], respect_retry_after_header=True, allowed_methods=frozenset(["GET", "POST"]))
+_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=_retry)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+PROMPT_VERSION = "v3"  # Part of the LLM cache key; bump whenever the prompt below changes
+
+# Static instructions go in the system message so providers can cache the prompt prefix; only the page text varies
+CAMP_SYSTEM_PROMPT = """
+You are a structured data extractor. From the text in the user message, extract ONLY the values below and return them in strict JSON format. You are looking for
+information about soccer camps, including the event name, start and end dates, ages, and cost. Only extract data if you
+are confident there is a soccer camp occurring in the near future. Do not return data just because you see the word soccer.
+There should be at least the word camp and probably a start date of some kind to represent a valid camp.
+If you are not confident, return an empty string for all fields. The text may contain various formats of dates.
+You may encounter data on multiple camps. If this is the case, return several JSON objects in an array. They may often be contained in an HTML table format.
+If you find a start_date but no end_date, assume the end_date is the same as the start_date.
+
+Fields:
+- event_name
+- address
+- start_date
+- end_date
+- ages
+- cost
+
+Return only this format, with one object per camp and an empty array if there is no camp:
+{"camps": [{"event_name":"", "address": "", "start_date": "", "end_date": "", "ages": "", "cost": ""}]}
+
+Even if the text does not contain all fields, return an empty string for those fields. Do not return any other text or explanation, just the JSON.
+"""
+
+LLM_PARSE_RETRIES = 2  # Re-prompts with the parse error before a page is marked "LLM Error"
+_CAMP_FIELDS = ["event_name", "address", "start_date", "end_date", "ages", "cost"]
+# Structured output schema; OpenAI-style schemas need an object at the top level, so camps are wrapped
+CAMP_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "camps",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "camps": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {field: {"type": "string"} for field in _CAMP_FIELDS},
+                        "required": _CAMP_FIELDS,
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["camps"],
+            "additionalProperties": False
+        }
+    }
+}
+SNIPPET_CHARS = 5000  # Max characters of page text sent to the LLM
+# A page with none of these (month name, m/d, or a year) has no camp dates, so the LLM would only answer "no camp"
+DATE_RE = re.compile(r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b|\b\d{1,2}/\d{1,2}\b|\b\d{4}\b", re.IGNORECASE)
 
 def get_llm_data(res, html_tag=None):
     """
@@ -15,55 +83,47 @@ def get_llm_data(res, html_tag=None):
     Returns:
         list: A list of additional camps extracted from the response.
     """
-    soup = BeautifulSoup(res.text, "html.parser")
+    soup = BeautifulSoup(res.content, "lxml")
     text_blocks = soup.select(html_tag) if html_tag else soup.find_all()  # Use CSS selectors for flexibility
     for i, tag in enumerate(text_blocks[:2]):
         print(f"Block {i + 1}: {tag.text.strip()}")
     relevant_lines = []
+    length = 0
 
+    # Collect block text until the snippet budget is used up
     for tag in text_blocks:
         if tag.text:
             text = tag.text.strip()
-            text_lower = text.lower()
+            if length + len(text) + 1 > SNIPPET_CHARS:
+                if not relevant_lines:
+                    relevant_lines.append(text[:SNIPPET_CHARS])
+                break
             relevant_lines.append(text)
+            length += len(text) + 1
 
-    snippet = "\n".join(relevant_lines)[:5000]
+    snippet = "\n".join(relevant_lines)
+    # The prompt only accepts a camp with the word camp and a date, so pages missing either are skipped
+    if "camp" not in snippet.lower() or not DATE_RE.search(snippet):
+        print("No camp or dates in page text; skipping LLM call")
+        return []
     OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-    prompt = f"""
-    You are a structured data extractor. From the following text, extract ONLY the values below and return them in strict JSON format. You are looking for
-    information about soccer camps, including the event name, start and end dates, ages, and cost. Only extract data if you
-    are confident there is a soccer camp occurring in the near future. Do not return data just because you see the word soccer.
-    There should be at least the word camp and probably a start date of some kind to represent a valid camp.
-    If you are not confident, return an empty string for all fields. The text may contain various formats of dates.
-    You may encounter data on multiple camps. If this is the case, return several JSON objects in an array. They may often be contained in an HTML table format.
-    If you find a start_date but no end_date, assume the end_date is the same as the start_date.
-
-    Fields:
-    - event_name
-    - address
-    - start_date
-    - end_date
-    - ages
-    - cost
-
-    Text:
-    {snippet}
-
-    Return only this format:
-    {{"event_name":"", "address": "", "start_date": "", "end_date": "", "ages": "", "cost": ""}}
-
-    Even if the text does not contain all fields, return an empty string for those fields. Do not return any other text or explanation, just the JSON.
-    """
 
     headers_llm = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json"
     }
+    model = "deepseek/deepseek-r1-0528-qwen3-8b:free"
+    messages = [
+        {"role": "system", "content": [{"type": "text", "text": CAMP_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]},
+        {"role": "user", "content": f"Text:\n{snippet}"}
+    ]
     payload = {
-        "model": "deepseek/deepseek-r1-0528-qwen3-8b:free",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.2
+        "model": model,
+        "messages": messages,
+        "temperature": 0.2,
+        "response_format": CAMP_RESPONSE_FORMAT
     }
+    cache_key = llm_cache.make_key(PROMPT_VERSION, model, snippet)
 
     addl_camps = []
     camp = {
@@ -77,51 +137,71 @@ def get_llm_data(res, html_tag=None):
     }
 
     try:
-        llm_resp = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers_llm, data=json.dumps(payload))
-        llm_json = llm_resp.json()
-        print("LLM Response:", llm_json)
-        if "choices" in llm_json and llm_json["choices"]:
-            llm_output = llm_json["choices"][0]["message"]["content"]
+        parsed = llm_cache.get(cache_key)
+        if parsed is None:
+            for attempt in range(LLM_PARSE_RETRIES + 1):
+                llm_resp = SESSION.post("https://openrouter.ai/api/v1/chat/completions", headers=headers_llm, data=orjson.dumps(payload))
+                llm_json = orjson.loads(llm_resp.content)
+                print("LLM Response:", llm_json)
+                if "choices" in llm_json and llm_json["choices"]:
+                    llm_output = llm_json["choices"][0]["message"]["content"]
+                else:
+                    raise ValueError("No 'choices' in LLM response")
+                try:
+                    try:
+                        # Structured output comes back as bare JSON, which orjson decodes directly
+                        parsed = orjson.loads(llm_output)
+                    except ValueError:
+                        # Not every free model honours response_format, so fall back to decoding from the
+                        # first '[' or '{' and ignore anything the model wraps around the JSON
+                        starts = [i for i in (llm_output.find('['), llm_output.find('{')) if i != -1]
+                        if not starts:
+                            raise ValueError("No JSON found in LLM output")
+                        parsed, _ = json.JSONDecoder().raw_decode(llm_output, min(starts))
+                    if isinstance(parsed, dict):
+                        parsed = parsed.get("camps", [parsed])
+                    if not isinstance(parsed, list):
+                        raise ValueError("Expected a list of camps in LLM output")
+                    # Objects with every field empty are the prompt's way of saying there is no camp
+                    parsed = [c for c in parsed if isinstance(c, dict) and any(c.values())]
+                    break
+                except ValueError as e:
+                    if attempt == LLM_PARSE_RETRIES:
+                        raise
+                    print(f"Retrying malformed LLM output: {e}")
+                    messages.extend([
+                        {"role": "assistant", "content": llm_output},
+                        {"role": "user", "content": f"Your output had error: {e}. Fix and retry."}
+                    ])
+                    time.sleep(2 ** attempt)
+            llm_cache.put(cache_key, parsed, model=model)
+        if isinstance(parsed, list) and len(parsed) > 0:
+            camp["Camp Found?"] = "Yes"
+            camp.update({
+                "Event Details": parsed[0].get("event_name", camp.get("Event Details")),
+                "start_date": parsed[0].get("start_date", ""),
+                "end_date": parsed[0].get("end_date", ""),
+                "Ages / Grade Level": parsed[0].get("ages", ""),
+                "Cost": parsed[0].get("cost", "")
+            })
+            addl_camps.append(camp)
+            print("Adding camp:", camp["Event Details"], "to the list.")
+            for camp_obj in parsed[1:]:
+                new_camp = {
+                    "Event Details": camp_obj.get("event_name", camp.get("Event Details")),
+                    "address": camp["address"],
+                    "start_date": camp_obj.get("start_date", ""),
+                    "end_date": camp_obj.get("end_date", ""),
+                    "Ages / Grade Level": camp_obj.get("ages", ""),
+                    "Cost": camp_obj.get("cost", ""),
+                    "Camp Found?": "Yes"
+                }
+                addl_camps.append(new_camp)
+                print("Adding additional camp:", new_camp["Event Details"], "to the list.")
         else:
-            raise ValueError("No 'choices' in LLM response")
-        if llm_output.startswith("```"):
-            llm_output = llm_output.strip("`").strip()
-        json_start = llm_output.find('[')
-        if json_start == -1:
-            raise ValueError("No '[' found in LLM output")
-        json_snippet = llm_output[json_start:]
-        try:
-            parsed = json.loads(json_snippet)
-        except json.JSONDecodeError:
-            raise
-        try:
-            if isinstance(parsed, list) and len(parsed) > 0:
-                camp["Camp Found?"] = "Yes"
-                camp.update({
-                    "Event Details": parsed[0].get("event_name", camp.get("Event Details")),
-                    "start_date": parsed[0].get("start_date", ""),
-                    "end_date": parsed[0].get("end_date", ""),
-                    "Ages / Grade Level": parsed[0].get("ages", ""),
-                    "Cost": parsed[0].get("cost", "")
-                })
-                addl_camps.append(camp)
-                print("Adding camp:", camp["Event Details"], "to the list.")
-                for camp_obj in parsed[1:]:
-                    new_camp = copy.deepcopy(camp)
-                    new_camp.update({
-                        "Event Details": camp_obj.get("event_name", camp.get("Event Details")),
-                        "start_date": camp_obj.get("start_date", ""),
-                        "end_date": camp_obj.get("end_date", ""),
-                        "Ages / Grade Level": camp_obj.get("ages", ""),
-                        "Cost": camp_obj.get("cost", "")
-                    })
-                    addl_camps.append(new_camp)
-                    print("Adding additional camp:", new_camp["Event Details"], "to the list.")
-            else:
-                camp["Camp Found?"] = "No"
-        except json.JSONDecodeError:
-            pass
-    except Exception:
+            camp["Camp Found?"] = "No"
+    except (ValueError, KeyError, TypeError, AttributeError):
+        # Only bad LLM output is recorded as an error; request failures surface to the caller
         camp["start_date"] = camp["end_date"] = camp["Ages / Grade Level"] = camp["Cost"] = "LLM Error"
     return addl_camps
 
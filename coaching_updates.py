@@ -1,13 +1,34 @@
 import os
 import pandas as pd
 import gspread
+from gspread.utils import rowcol_to_a1
 import re
+import threading
 from google.oauth2.service_account import Credentials
-from thefuzz import process
+from rapidfuzz import process, fuzz, utils
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import csv
-from bs4 import BeautifulSoup
+import io
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urljoin
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import lru_cache
+from collections import defaultdict
+
+LOOKUP_WORKERS = 16  # Concurrent coach-page fetches when resolving new coach URLs
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+ONLY_LINKS = SoupStrainer('a', href=True)
+
+# Shared session so repeat lookups on the same athletics site reuse the connection
+SESSION = requests.Session()
+_retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET", "HEAD"])
+_adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64, max_retries=_retry)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update(HEADERS)
 
 def process_coaching_updates(updates_csv, sheet_id, tab_name, gender):
     # Load and filter updates
@@ -38,10 +59,18 @@ def process_coaching_updates(updates_csv, sheet_id, tab_name, gender):
     creds = Credentials.from_service_account_file("/Users/fbird/Desktop/Testing/CSP/cspscraping-4e20669fcaf7.json", scopes=scope)
     client = gspread.authorize(creds)
     sheet = client.open_by_key(sheet_id).worksheet(tab_name)
-    # Get headers from the second row
-    header_row = sheet.row_values(2)
-    sheet_data = pd.DataFrame(sheet.get_all_records(head=2))
+    # One read for the whole tab: headers are in the second row and data starts in the third
+    all_values = sheet.get_all_values()
+    header_row = all_values[1]
+    sheet_data = pd.DataFrame(all_values[2:], columns=header_row)
     sheet_school_list = sheet_data['university_name'].tolist()
+    # Normalize the candidate names once rather than on every extractOne call
+    processed_school_list = [utils.default_process(str(s)) for s in sheet_school_list]
+    # Token -> positions of the schools containing it, to narrow each fuzzy match to schools sharing a word
+    school_token_index = defaultdict(set)
+    for i, name in enumerate(processed_school_list):
+        for token in name.split():
+            school_token_index[token].add(i)
 
     # Hard-coded name matches for universities where fuzzy matching won't work
     hard_coded_matches = {
@@ -54,7 +83,23 @@ def process_coaching_updates(updates_csv, sheet_id, tab_name, gender):
         # Add more pairs as needed: "name_in_changes": "name_in_universities_tab"
     }
 
-    for _, row in updates.iterrows():
+    prev_url_col = 'men_coach_url' if gender == 'men' else 'women_coach_url'
+    # 1-based sheet column for each header, keeping the first if a header repeats
+    col_idx = {}
+    for i, name in enumerate(header_row):
+        col_idx.setdefault(name, i + 1)
+    email_col_idx = col_idx.get(email_col)
+    name_col_idx = col_idx.get(name_col)
+    coach_url_col_idx = col_idx.get(prev_url_col)
+    # Coach URL lookups fetch a page each, so they are queued here and run concurrently after the loop
+    pending_lookups = []
+    # Cell writes are collected and sent to the sheet in one batch_update at the end
+    pending_cells = []
+
+    # Sheet row positions for each university, so matching a school is a dict lookup instead of a column scan
+    school_rows = sheet_data.groupby('university_name', sort=False).indices
+
+    for row in updates.to_dict('records'):
         school = row['School']
         # Check hard-coded matches first
         if school in hard_coded_matches:
@@ -62,9 +107,14 @@ def process_coaching_updates(updates_csv, sheet_id, tab_name, gender):
             print(f"Using hard-coded match for {school}: {matched_school}")
         else:
             # Fuzzy match school name
-            best_match = process.extractOne(school, sheet_school_list)
-            if best_match and best_match[1] >= 90:
-                matched_school = best_match[0]
+            # Same scorer and preprocessing thefuzz used; extractOne returns None below the cutoff
+            processed_school = utils.default_process(str(school))
+            candidates = set().union(*(school_token_index.get(token, ()) for token in processed_school.split()))
+            # With no shared word the whole list is searched, so a misspelt one-word name can still match
+            choices = {i: processed_school_list[i] for i in candidates} if candidates else processed_school_list
+            best_match = process.extractOne(processed_school, choices, scorer=fuzz.WRatio, processor=None, score_cutoff=90)
+            if best_match:
+                matched_school = sheet_school_list[best_match[2]]
             else:
                 print(f"No good match found for {school}")
                 continue
@@ -78,77 +128,75 @@ def process_coaching_updates(updates_csv, sheet_id, tab_name, gender):
             new_email = None
             print(f"No email found for {school} in changes. Skipping email update.")
 
-        mask = sheet_data['university_name'] == matched_school
-        if not mask.any():
+        matched_rows = school_rows.get(matched_school)
+        if matched_rows is None:
             continue
-        for idx in sheet_data.index[mask]:
+        for idx in matched_rows:
             output_message = f"""Updated row {idx} in Universities tab for school: {matched_school} with coach: {new_name}"""
             row_num = idx + 3  # Account for header in row 2 and data starting in row 3
-            # Get column indices (1-based for Google Sheets)
-            try:
-                email_col_idx = header_row.index(email_col) + 1
-            except ValueError:
+            if email_col_idx is None:
                 print(f"Column '{email_col}' not found in Google Sheet.")
                 continue
-            try:
-                name_col_idx = header_row.index(name_col) + 1
-            except ValueError:
+            if name_col_idx is None:
                 print(f"Column '{name_col}' not found in Google Sheet.")
-                name_col_idx = None
             if change == 'e':
                 if new_email:
                     output_message = f"Updated row {idx} in Universities tab for coach {new_name} with email: {new_email}"
-                    sheet.update_cell(row_num, email_col_idx, new_email)
+                    pending_cells.append({"range": rowcol_to_a1(row_num, email_col_idx), "values": [[new_email]]})
                     continue
             elif any(x in change for x in ['j', 'x']):
                 if name_col_idx:
-                    sheet.update_cell(row_num, name_col_idx, new_name)
+                    pending_cells.append({"range": rowcol_to_a1(row_num, name_col_idx), "values": [[new_name]]})
                 if new_email:
                     output_message += f" and email: {new_email}"
-                    sheet.update_cell(row_num, email_col_idx, new_email)
+                    pending_cells.append({"range": rowcol_to_a1(row_num, email_col_idx), "values": [[new_email]]})
 
             # Get previous coach URL from the sheet
-            prev_url_col = 'men_coach_url' if gender == 'men' else 'women_coach_url'
             try:
-                prev_url_col_idx = header_row.index(prev_url_col)
                 prev_url = sheet_data.iloc[idx][prev_url_col]
             except Exception:
                 prev_url = ''
-            # Generate new coach URL by searching the roster, staff-directory, or general coaches page
-            new_coach_url = ''
+            # Queue a search of the roster, staff-directory, or general coaches page for the new coach URL
             if prev_url and new_name:
+                fallback_url = ''
                 # Try /roster pattern
                 if '/roster/coaches/' in prev_url:
-                    roster_base = prev_url.split('/roster/coaches/')[0] + '/roster'
-                    found_url = find_coach_profile_url_roster(roster_base, new_name)
-                    if found_url:
-                        output_message += f" and URL: {found_url}"
-                        new_coach_url = found_url
-                    else:
-                        new_coach_url = roster_base + '/coaches/'
-                        output_message += f" and URL: {new_coach_url} (coach URL not updated yet)"
+                    base_url = prev_url.split('/roster/coaches/')[0] + '/roster'
+                    lookup = find_coach_profile_url_roster
+                    fallback_url = base_url + '/coaches/'
                 # Try /staff-directory pattern
                 elif '/staff-directory/' in prev_url:
-                    staff_base = prev_url.split('/staff-directory/')[0] + '/staff-directory'
-                    found_url = find_coach_profile_url_staff_directory(staff_base, new_name)
-                    if found_url:
-                        output_message += f" and URL: {found_url}"
-                        new_coach_url = found_url
+                    base_url = prev_url.split('/staff-directory/')[0] + '/staff-directory'
+                    lookup = find_coach_profile_url_staff_directory
                 # Try general coaches page for patterns like .../sports/wsoc/coaches/First_Last or /sports/womens-soccer/coaches
                 else:
                     if '/coaches' in prev_url:
-                        staff_base = prev_url.split('/coaches')[0] + '/coaches'
+                        base_url = prev_url.split('/coaches')[0] + '/coaches'
                     else:
-                        staff_base = prev_url
-                    found_url = find_coach_profile_url_general_coaches(staff_base, new_name)
-                    if found_url:
-                        output_message += f" and URL: {found_url}"
-                        new_coach_url = found_url
-            # Update coach URL in Google Sheet
-            coach_url_col_idx = header_row.index(prev_url_col) + 1 if prev_url_col in header_row else None
-            if new_coach_url and coach_url_col_idx:
-                sheet.update_cell(row_num, coach_url_col_idx, new_coach_url)
-            print(output_message)
+                        base_url = prev_url
+                    lookup = find_coach_profile_url_general_coaches
+                pending_lookups.append((row_num, output_message, lookup, base_url, new_name, fallback_url))
+            else:
+                print(output_message)
+
+    # The find_coach_profile_url_* helpers catch their own errors and return None on failure
+    with ThreadPoolExecutor(max_workers=LOOKUP_WORKERS) as executor:
+        futures = [executor.submit(lookup, base_url, new_name) for _, _, lookup, base_url, new_name, _ in pending_lookups]
+    for (row_num, output_message, _, _, _, fallback_url), future in zip(pending_lookups, futures):
+        new_coach_url = future.result()
+        if new_coach_url:
+            output_message += f" and URL: {new_coach_url}"
+        elif fallback_url:
+            new_coach_url = fallback_url
+            output_message += f" and URL: {new_coach_url} (coach URL not updated yet)"
+        # Update coach URL in Google Sheet
+        if new_coach_url and coach_url_col_idx:
+            pending_cells.append({"range": rowcol_to_a1(row_num, coach_url_col_idx), "values": [[new_coach_url]]})
+        print(output_message)
+
+    if pending_cells:
+        sheet.batch_update(pending_cells, value_input_option="USER_ENTERED")
+        print(f"Wrote {len(pending_cells)} cell updates to {tab_name}.")
 
 def extract_division_from_filename(filename):
     # Get just the filename, not the full path
@@ -163,37 +211,92 @@ def preprocess_csv_file(file_path):
     """
     Ensure the CSV has 'Conference' as the first value; if not, delete the first 5 rows.
     Also normalize the 6th column header to 'Change'. Modifies the file in-place.
+    Only the leading lines are parsed; the body is written back byte-for-byte.
     """
     try:
-        with open(file_path, newline='', encoding='utf-8') as f:
-            rows = list(csv.reader(f))
+        with open(file_path, 'rb') as f:
+            data = f.read()
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
         return
 
-    if not rows:
+    if not data:
         return
 
     # If first value isn't 'Conference', drop the first 5 rows
-    if not rows[0] or rows[0][0] != "Conference":
+    first_value = data.split(b'\n', 1)[0].split(b',', 1)[0].strip(b'\r').strip(b'"')
+    if first_value != b"Conference":
         print("First value is not 'Conference'. Dropping first 5 rows.")
-        rows = rows[5:] if len(rows) >= 5 else []
+        offset = 0
+        for _ in range(5):
+            newline = data.find(b'\n', offset)
+            if newline == -1:
+                offset = len(data)
+                break
+            offset = newline + 1
+        data = data[offset:]
 
     # Ensure header exists and set 6th column to 'Change'
-    if rows:
-        header = rows[0]
+    if data:
+        newline = data.find(b'\n')
+        header_end = newline + 1 if newline != -1 else len(data)
+        try:
+            header = next(csv.reader([data[:header_end].decode('utf-8')]), [])
+        except UnicodeDecodeError as e:
+            print(f"Error reading {file_path}: {e}")
+            return
         if len(header) < 6:
             header += [""] * (6 - len(header))
         header[5] = "Change"
-        rows[0] = header
+        header_buf = io.StringIO()
+        line_ending = '\r\n' if data[:header_end].endswith(b'\r\n') else '\n'
+        csv.writer(header_buf, lineterminator=line_ending).writerow(header)
+        data = header_buf.getvalue().encode('utf-8') + data[header_end:]
 
     try:
-        with open(file_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerows(rows)
+        with open(file_path, 'wb') as f:
+            f.write(data)
     except Exception as e:
         print(f"Error writing {file_path}: {e}")
 
+# One future per page URL, so coaches looked up on the same page at the same time share a single fetch
+_link_futures = {}
+_link_futures_lock = threading.Lock()
+
+def _load_links(url):
+    response = SESSION.get(url, timeout=20)
+    # Only links are ever inspected, so skip building the rest of the tree
+    soup = BeautifulSoup(response.content, "lxml", parse_only=ONLY_LINKS)
+    return tuple(soup.find_all('a', href=True))
+
+def _fetch_links(url):
+    """
+    Fetch a page once and return its <a href> tags; several coaches are often looked up on the same page.
+    The first caller for a URL does the fetch and later callers wait on its future, so lookups that run
+    concurrently don't fetch the page again. A failed fetch is remembered and raised to every caller.
+    """
+    with _link_futures_lock:
+        future = _link_futures.get(url)
+        is_owner = future is None
+        if is_owner:
+            future = _link_futures[url] = Future()
+    if is_owner:
+        try:
+            future.set_result(_load_links(url))
+        except Exception as e:
+            future.set_exception(e)
+    return future.result()
+
+@lru_cache(maxsize=1024)
+def _coach_name_patterns(coach_name):
+    """
+    Return the normalized coach name and a regex matching its URL forms (first-last, first_last, firstlast).
+    Cached because the same coach is often searched for on more than one page.
+    """
+    coach_name_norm = ' '.join(coach_name.lower().split())  # collapse extra spaces
+    url_forms = (coach_name_norm.replace(' ', '-'), coach_name_norm.replace(' ', '_'), coach_name_norm.replace(' ', ''))
+    return coach_name_norm, re.compile('|'.join(re.escape(form) for form in url_forms))
+
 def find_coach_profile_url_roster(base_url, coach_name):
     """
     Search the /roster page for the coach's profile URL using the /roster/coaches/ pattern.
@@ -201,30 +304,24 @@ def find_coach_profile_url_roster(base_url, coach_name):
     (normalized forms like first-last, first_last, or firstlast).
     """
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(base_url, headers=headers, timeout=20)
-        soup = BeautifulSoup(response.text, "html.parser")
+        links = _fetch_links(base_url)
 
-        # Normalized versions of the coach name for matching in URLs
-        coach_name_norm = ' '.join(coach_name.lower().split())  # collapse extra spaces
-        coach_name_url = coach_name_norm.replace(' ', '-')
-        coach_name_url_alt = coach_name_norm.replace(' ', '_')
-        coach_name_nospace = coach_name_norm.replace(' ', '')
+        coach_name_norm, coach_name_href_re = _coach_name_patterns(coach_name)
 
-        for a in soup.find_all('a', href=True):
+        for a in links:
             href = a.get('href', '') or ''
-            text = (a.get_text() or '').lower()
-            aria = (a.get('aria-label') or '').lower()
             href_lower = href.lower()
 
             # Only consider roster coach links
             if '/roster/coaches/' in href_lower:
                 # Match if name appears in the link text or aria-label
+                text = (a.get_text() or '').lower()
+                aria = (a.get('aria-label') or '').lower()
                 if coach_name_norm in text or coach_name_norm in aria:
                     return urljoin(base_url, href)
 
                 # Match if a normalized form of the coach name appears in the href
-                if any(token in href_lower for token in (coach_name_url, coach_name_url_alt, coach_name_nospace)):
+                if coach_name_href_re.search(href_lower):
                     return urljoin(base_url, href)
 
         return None
@@ -237,10 +334,8 @@ def find_coach_profile_url_staff_directory(base_url, coach_name):
     Search the /staff-directory page for the coach's profile URL using the /staff-directory/ pattern.
     """
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(base_url, headers=headers, timeout=20)
-        soup = BeautifulSoup(response.text, "html.parser")
-        for a in soup.find_all('a', href=True):
+        links = _fetch_links(base_url)
+        for a in links:
             if coach_name.lower() in a.text.lower() and '/staff-directory/' in a['href']:
                 href = a['href']
                 return urljoin(base_url, href)
@@ -254,11 +349,9 @@ def find_coach_profile_url_general_coaches(base_url, coach_name):
     Search a general coaches page for the coach's profile URL.
     """
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(base_url, headers=headers, timeout=20)
-        soup = BeautifulSoup(response.text, "html.parser")
+        links = _fetch_links(base_url)
         coach_name_url = coach_name.lower().replace(' ', '-')
-        for a in soup.find_all('a', href=True):
+        for a in links:
             if coach_name.lower() in a.text.lower() or (coach_name_url in a['href'].lower()):
                 href = a['href']
                 return urljoin(base_url, href)
@@ -267,6 +360,23 @@ def find_coach_profile_url_general_coaches(base_url, coach_name):
         print(f"Error searching for coach profile on general coaches page: {e}")
         return None
 
+def process_updates_file(updates_csv, sheet_id, tab_name):
+    """Preprocess one coaching-changes CSV and apply it to the sheet. Runs in a worker process."""
+    # Preprocess the CSV to ensure correct header/rows
+    preprocess_csv_file(updates_csv)
+
+    filename = os.path.basename(updates_csv).lower()
+    if 'women' in filename:
+        gender = 'women'
+    elif 'men' in filename:
+        gender = 'men'
+    else:
+        print(f"Skipping {updates_csv}: could not determine gender from filename.")
+        return
+    print(extract_division_from_filename(updates_csv), ":")
+
+    process_coaching_updates(updates_csv, sheet_id, tab_name, gender)
+
 def main():
     import glob
     folder = "/Users/fbird/Desktop/Testing/CSP/coaching_changes/July"  # Path to the folder containing the 8 CSVs
@@ -276,22 +386,18 @@ def main():
     # Find all CSV files in the folder
     csv_files = glob.glob(os.path.join(folder, '*.csv'))
     print(f"Found {len(csv_files)} update files.")
-    for updates_csv in csv_files:
-
-        # Preprocess the CSV to ensure correct header/rows
-        preprocess_csv_file(updates_csv)
+    if not csv_files:
+        return
 
-        filename = os.path.basename(updates_csv).lower()
-        if 'women' in filename:
-            gender = 'women'
-        elif 'men' in filename:
-            gender = 'men'
-        else:
-            print(f"Skipping {updates_csv}: could not determine gender from filename.")
-            continue
-        print(extract_division_from_filename(updates_csv), ":")
-        
-        process_coaching_updates(updates_csv, sheet_id, tab_name, gender)
+    # Each file is independent and opens its own sheet client, so the files are processed in parallel.
+    # Each one only reads the tab once and writes once, which keeps well under the Sheets quota.
+    with ProcessPoolExecutor(max_workers=min(8, len(csv_files))) as executor:
+        futures = [executor.submit(process_updates_file, updates_csv, sheet_id, tab_name) for updates_csv in csv_files]
+    for updates_csv, future in zip(csv_files, futures):
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Error processing {updates_csv}: {e}")
 
 if __name__ == "__main__":
     main()
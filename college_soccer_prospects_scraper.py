@@ -1,6 +1,9 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
 from camp_scraper import get_llm_data
 
 URLS = [
@@ -12,27 +15,46 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 }
 
+SESSION = requests.Session()
+_retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET", "HEAD"])
+_adapter = HTTPAdapter(max_retries=_retry)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update(HEADERS)
+
+def scrape_csp_page(url: str) -> List[Dict[str, str]]:
+    """Scrape camp data from a single College Soccer Prospects site."""
+    try:
+        res = SESSION.get(url, timeout=10)
+    except Exception:
+        return []
+    camp = {
+        "Camp Info URL": url,
+        "Camp Found?": "",
+        "Event Details": "",
+        "start_date": "",
+        "end_date": "",
+        "Ages / Grade Level": "",
+        "Cost": "",
+    }
+    camps = [camp]
+    try:
+        addl = get_llm_data(res, "div.dt-box")
+    except requests.RequestException as e:
+        # A failed OpenRouter call only costs this site's camps, not the rest of the batch
+        print(f"LLM request failed for {url}: {e}")
+        camp["start_date"] = camp["end_date"] = camp["Ages / Grade Level"] = camp["Cost"] = "LLM Error"
+        return camps
+    if addl:
+        camps.extend(addl)
+    return camps
+
 def scrape_csp_pages(urls: List[str] = URLS) -> List[Dict[str, str]]:
-    """Scrape camp data from College Soccer Prospects sites."""
+    """Scrape camp data from College Soccer Prospects sites, fetching the sites concurrently."""
     camps: List[Dict[str, str]] = []
-    for url in urls:
-        try:
-            res = requests.get(url, headers=HEADERS, timeout=10)
-        except Exception:
-            continue
-        camp = {
-            "Camp Info URL": url,
-            "Camp Found?": "",
-            "Event Details": "",
-            "start_date": "",
-            "end_date": "",
-            "Ages / Grade Level": "",
-            "Cost": "",
-        }
-        addl = get_llm_data(res, "div.dt-box")
-        camps.append(camp)
-        if addl:
-            camps.extend(addl)
+    with ThreadPoolExecutor(max_workers=max(1, len(urls))) as executor:
+        for site_camps in executor.map(scrape_csp_page, urls):
+            camps.extend(site_camps)
     return camps
 
 if __name__ == "__main__":
@@ -12,11 +12,17 @@ Usage: python collegedata_scraper.py <url> [--out out.csv]
 """
 import argparse
 import csv
+import html
+import os
 import re
+import threading
 import time
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree, html as lxml_html
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # Optional Google Sheets support
 try:
@@ -29,12 +35,64 @@ SHEET_NAME = "Universities"
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; collegedata-scraper/1.0)"}
 
+# One pooled keep-alive session so pages on the same host reuse their TLS connections
+SESSION = requests.Session()
+_retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET", "HEAD"])
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=_retry)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update(HEADERS)
+
+WS_RE = re.compile(r"\s+")
 CURRENCY_RE = re.compile(r"\$[0-9,]+")
 YEAR_TOKEN_RE = re.compile(r"\d{4}")
+NUMBER_RE = re.compile(r"[0-9,]+")
+NON_DIGIT_RE = re.compile(r"[^0-9]")
+DECIMAL_TOKEN_RE = re.compile(r"\d\.\d+")
+DECIMAL_NUMBER_RE = re.compile(r"\A\d+\.\d+\Z")
+GPA_TOKEN_RE = re.compile(r"\b(\d\.\d{2})\b")
+# Header names (stripped, lowercased) recognized as the academic info URL column
+URL_COLUMN_ALIASES = ("academic_info_url", "academic info url", "academicinfo_url", "academicinfo url", "academic_infourl", "academicinfo", "url", "website")
+# Sheet URLs are fetched through the waf. host; these split out the collegedata.com host and path in one match
+WAF_PREFIX_RE = re.compile(r"(?:https?://)?waf\.", re.I)
+COLLEGEDATA_URL_RE = re.compile(r"(?:https?://)?(?:www\.)?((?:[^/?#:@.]+\.)*collegedata\.com(?:[/?#].*)?)\Z", re.I | re.S)
+
+
+def _has_class(cls: str) -> str:
+    """XPath predicate matching elements whose class attribute contains the exact class token."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+# CollegeData CSS-module class names; every XPath and byte pattern below is built from these
+STAT_CLASS = "StatBlock_body__3x6Pr"
+TITLE_CLASS = "TitleValue_title__2-afK"
+VALUE_CLASS = "TitleValue_value__1JT0d"
+
+# Compiled once and reused for every page
+STAT_BLOCK_XPATH = etree.XPath(f"(//div[{_has_class(STAT_CLASS)}])[1]")
+VALUE_XPATH = etree.XPath(f"//div[{_has_class(VALUE_CLASS)}]")
+TITLE_XPATH = etree.XPath(f"//div[{_has_class(TITLE_CLASS)}]")
+PREV_TITLE_XPATH = etree.XPath(f"preceding-sibling::div[{_has_class(TITLE_CLASS)}][1]")
+NEXT_TITLE_XPATH = etree.XPath(f"following-sibling::div[{_has_class(TITLE_CLASS)}][1]")
+DESC_TITLE_XPATH = etree.XPath(f"(.//div[{_has_class(TITLE_CLASS)}])[1]")
+
+# Byte-level equivalents for the regex fast path in parse_page
+STAT_CLASS_B = STAT_CLASS.encode()
+TITLE_CLASS_B = TITLE_CLASS.encode()
+VALUE_CLASS_B = VALUE_CLASS.encode()
+
+
+def _div_open_b(cls: bytes) -> bytes:
+    """Pattern for an opening <div> whose double-quoted class attribute contains the exact class token."""
+    return rb'<div\s(?:[^>]*?\s)?class="(?:[^"]*\s)?' + re.escape(cls) + rb'(?:\s[^"]*)?"[^>]*>'
+
+
+STAT_DIV_RE_B = re.compile(_div_open_b(STAT_CLASS_B) + rb"([^<]*)</div>")
+TV_PAIR_RE_B = re.compile(_div_open_b(TITLE_CLASS_B) + rb"([^<]*)</div>\s*" + _div_open_b(VALUE_CLASS_B) + rb"([^<]*)</div>")
 
 
 def clean_text(s: str) -> str:
-    return " ".join(s.split()).strip()
+    return WS_RE.sub(" ", s).strip()
 
 
 def parse_currency(s: str):
@@ -42,7 +100,7 @@ def parse_currency(s: str):
     if not m:
         return None
     val = m.group(0)
-    digits = re.sub(r"[^0-9]", "", val)
+    digits = NON_DIGIT_RE.sub("", val)
     try:
         return int(digits)
     except Exception:
@@ -50,64 +108,74 @@ def parse_currency(s: str):
 
 
 def is_decimal_number(s: str):
-    s2 = s.strip()
-    return bool(re.match(r"^\d+\.\d+$(?!\d)", s2)) or bool(re.match(r"^\d\.\d+$", s2))
+    return DECIMAL_NUMBER_RE.match(s.strip()) is not None
 
 
-def extract_from_url(url: str):
-    r = requests.get(url, headers=HEADERS, timeout=30)
+def _to_waf(u: str) -> str:
+    """Rewrite a collegedata.com URL (any scheme, with or without www.) to https://waf.<host>; other URLs pass through."""
+    if WAF_PREFIX_RE.match(u):
+        return u
+    m = COLLEGEDATA_URL_RE.match(u)
+    return "https://waf." + m.group(1) if m else u
+
+
+def _header_index(header) -> dict:
+    """Map each stripped, lowercased header name to the index of its first occurrence."""
+    header_idx = {}
+    for i, h in enumerate(header):
+        if h:
+            header_idx.setdefault(str(h).strip().lower(), i)
+    return header_idx
+
+
+def _url_column_index(header_idx: dict):
+    """Index of the leftmost URL column in the header, or None."""
+    return min((header_idx[a] for a in URL_COLUMN_ALIASES if a in header_idx), default=None)
+
+
+def element_text(el) -> str:
+    """Whitespace-normalized text of an element, with child text runs separated by spaces."""
+    return clean_text(" ".join(el.itertext()))
+
+
+def _first_title_text(matches) -> str:
+    return clean_text(matches[0].text_content()) if matches else ""
+
+
+def fetch_page(url: str) -> bytes:
+    r = SESSION.get(url, timeout=30)
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
-
-    # Undergraduates
-    undergrad = None
-    ug_el = soup.find("div", class_="StatBlock_body__3x6Pr")
-    if ug_el:
-        t = clean_text(ug_el.get_text(" ", strip=True))
-        # extract digits
-        m = re.search(r"[0-9,]+", t)
-        if m:
-            try:
-                undergrad = int(re.sub(r"[^0-9]", "", m.group(0)))
-            except Exception:
-                undergrad = None
+    return r.content
 
-    # Tuition / GPA elements (same class) - gather candidates
+
+def _parse_undergrad(t: str):
+    # extract digits
+    m = NUMBER_RE.search(t)
+    if m:
+        try:
+            return int(NON_DIGIT_RE.sub("", m.group(0)))
+        except Exception:
+            return None
+    return None
+
+
+def _classify_values(pairs):
+    """Pick in-state tuition, out-of-state tuition and average GPA from (title, value) text pairs in page order."""
     in_state = None
     out_state = None
     avg_gpa = None
 
-    elems = soup.find_all("div", class_="TitleValue_value__1JT0d")
-    for el in elems:
-        # Determine the title/label associated with this value element. It is often a nearby div with class TitleValue_title__2-afK
-        # Search previous sibling, next sibling, then parent and one ancestor to be robust to markup variations.
-        title_text = ""
-        try:
-            prev = el.find_previous_sibling("div", class_="TitleValue_title__2-afK")
-            if prev and prev.get_text():
-                title_text = clean_text(prev.get_text())
-            else:
-                nxt = el.find_next_sibling("div", class_="TitleValue_title__2-afK")
-                if nxt and nxt.get_text():
-                    title_text = clean_text(nxt.get_text())
-                else:
-                    parent = el.parent
-                    if parent:
-                        t_el = parent.find("div", class_="TitleValue_title__2-afK")
-                        if t_el and t_el.get_text():
-                            title_text = clean_text(t_el.get_text())
-                        else:
-                            gp = parent.parent if parent else None
-                            if gp:
-                                t_el2 = gp.find("div", class_="TitleValue_title__2-afK")
-                                if t_el2 and t_el2.get_text():
-                                    title_text = clean_text(t_el2.get_text())
-        except Exception:
-            title_text = ""
+    # first GPA-looking token across all value blocks, used if no block yields a GPA outright
+    first_gpa_candidate = None
 
-        lower_title = title_text.lower() if title_text else ""
-        text = clean_text(el.get_text(" ", strip=True))
+    for title_text, text in pairs:
         lower = text.lower()
+        if first_gpa_candidate is None:
+            m = GPA_TOKEN_RE.search(text)
+            if m:
+                first_gpa_candidate = float(m.group(1))
+
+        lower_title = title_text.lower() if title_text else ""
 
         # Skip Cost of Attendance entries explicitly
         if "cost of attendance" in lower_title:
@@ -152,7 +220,7 @@ def extract_from_url(url: str):
         if is_decimal_number(text) or ("gpa" in lower_title):
             if avg_gpa is None:
                 # try to extract a decimal token
-                m = re.search(r"\d\.\d+", text)
+                m = DECIMAL_TOKEN_RE.search(text)
                 if m:
                     try:
                         avg_gpa = float(m.group(0))
@@ -170,16 +238,84 @@ def extract_from_url(url: str):
 
     # Final heuristic: if no GPA found but some TitleValue entries contain a decimal-looking token, pick first
     if avg_gpa is None:
-        for el in elems:
-            t = clean_text(el.get_text(" ", strip=True))
-            m = re.search(r"\b(\d\.\d{2})\b", t)
-            if m:
-                try:
-                    avg_gpa = float(m.group(1))
-                    break
-                except Exception:
-                    pass
+        avg_gpa = first_gpa_candidate
+
+    return in_state, out_state, avg_gpa
+
+
+def _fast_page_text(body: bytes):
+    """Pull the stat text and (title, value) pairs straight from the bytes when the markup is unambiguous.
 
+    Only trusted when every title/value div is a plain-text title immediately followed by its value sibling and the
+    matched text is ASCII, so the result is exactly what the lxml walk would find. Returns None otherwise.
+    """
+    pairs = TV_PAIR_RE_B.findall(body)
+    if body.count(TITLE_CLASS_B) != len(pairs) or body.count(VALUE_CLASS_B) != len(pairs):
+        return None
+    stat = STAT_DIV_RE_B.search(body)
+    if stat is None or not stat.start() <= body.find(STAT_CLASS_B) < stat.end():
+        return None
+    try:
+        stat_text = clean_text(html.unescape(stat.group(1).decode("ascii")))
+        text_pairs = [
+            (clean_text(html.unescape(t.decode("ascii"))), clean_text(html.unescape(v.decode("ascii"))))
+            for t, v in pairs
+        ]
+    except UnicodeDecodeError:
+        return None
+    # an empty title would send the lxml walk on to other titles
+    if not all(title for title, _ in text_pairs):
+        return None
+    return stat_text, text_pairs
+
+
+def _lxml_page_text(body: bytes):
+    """Stat text and (title, value) pairs found by walking the parsed tree."""
+    # Raw lxml with compiled XPath keeps the element walk in C; given bytes it picks the encoding from the meta charset
+    tree = lxml_html.fromstring(body)
+
+    ug_matches = STAT_BLOCK_XPATH(tree)
+    stat_text = element_text(ug_matches[0]) if ug_matches else None
+
+    # Group title divs by parent in one walk; a parent with a single title makes the per-value sibling search unnecessary.
+    # That title's text is read once here rather than once per value sharing the parent.
+    titles_by_parent = {}
+    for t in TITLE_XPATH(tree):
+        titles_by_parent.setdefault(t.getparent(), []).append(t)
+    lone_title_text = {parent: _first_title_text(ts) for parent, ts in titles_by_parent.items() if len(ts) == 1}
+
+    pairs = []
+    for el in VALUE_XPATH(tree):
+        # Determine the title/label associated with this value element. It is often a nearby div with class TitleValue_title__2-afK
+        # Use the parent's lone title when there is one, else search previous sibling, next sibling, then parent and one
+        # ancestor to be robust to markup variations.
+        parent = el.getparent()
+        title_text = lone_title_text.get(parent, "")
+        if not title_text:
+            title_text = _first_title_text(PREV_TITLE_XPATH(el)) or _first_title_text(NEXT_TITLE_XPATH(el))
+        if not title_text and parent is not None:
+            title_text = _first_title_text(DESC_TITLE_XPATH(parent))
+            gp = parent.getparent()
+            if not title_text and gp is not None:
+                title_text = _first_title_text(DESC_TITLE_XPATH(gp))
+        pairs.append((title_text, element_text(el)))
+    return stat_text, pairs
+
+
+def parse_page(url: str, body: bytes):
+    """Extract the four CollegeData fields from a fetched page. Pure CPU work, so main() runs it in worker processes."""
+    fields = None
+    # Regex over the raw bytes skips building the tree; pages it can't fully answer go through lxml
+    fast = _fast_page_text(body)
+    if fast is not None:
+        stat_text, pairs = fast
+        fields = (_parse_undergrad(stat_text),) + _classify_values(pairs)
+    if fields is None or None in fields:
+        stat_text, pairs = _lxml_page_text(body)
+        undergrad = _parse_undergrad(stat_text) if stat_text is not None else None
+        fields = (undergrad,) + _classify_values(pairs)
+
+    undergrad, in_state, out_state, avg_gpa = fields
     return {
         "url": url,
         "undergraduates": undergrad,
@@ -189,10 +325,33 @@ def extract_from_url(url: str):
     }
 
 
+def extract_from_url(url: str):
+    return parse_page(url, fetch_page(url))
+
+
+# Next time each host may be hit; shared by the scraping threads
+_host_next_slot = {}
+_host_lock = threading.Lock()
+
+
+def _wait_for_host_slot(url: str, delay: float) -> None:
+    """Block until this host's next request slot, reserving the following one delay seconds later."""
+    host = urlparse(url).netloc.lower()
+    with _host_lock:
+        now = time.monotonic()
+        slot = max(now, _host_next_slot.get(host, now))
+        _host_next_slot[host] = slot + delay
+    if slot > now:
+        time.sleep(slot - now)
+
+
 def main():
     p = argparse.ArgumentParser()
     p.add_argument("--out", help="Output CSV file (optional)", default="collegedata_out.csv")
-    p.add_argument("--delay", type=float, default=0.5, help="Delay between requests in seconds")
+    p.add_argument("--delay", type=float, default=0.5, help="Minimum seconds between request starts to the same host")
+    p.add_argument("--workers", type=int, default=8, help="Number of pages fetched concurrently")
+    p.add_argument("--parse-workers", type=int, default=os.cpu_count(), help="Number of processes parsing fetched pages")
+    p.add_argument("--resume", action="store_true", help="Keep successful rows already in --out and only scrape the remaining URLs")
     p.add_argument("--write-back-only", action="store_true", help="Skip scraping and write results from the CSV back to the Google Sheet")
     p.add_argument("--creds", help="Path to service account JSON for sheet writeback", default="cspscraping.json")
     args = p.parse_args()
@@ -226,8 +385,8 @@ def main():
     except Exception:
         ws = sh.sheet1
 
-    # Read all values from the sheet and ignore the first row (duplicate headers).
-    rows = ws.get_all_values()
+    # Read all values from the sheet in one values.get call and ignore the first row (duplicate headers).
+    rows = ws.get()
     urls = []
     if len(rows) >= 2:
         # Use second row as header, data starts on row 3
@@ -235,18 +394,11 @@ def main():
         data_rows = rows[2:]
 
         # find column index for academic_info_url (case-insensitive)
-        col_idx = None
-        for i, h in enumerate(header):
-            if h and h.strip().lower() in ("academic_info_url", "academic info url", "academicinfo_url", "academicinfo url", "academic_infourl", "academicinfo", "url", "website"):
-                col_idx = i
-                break
+        col_idx = _url_column_index(_header_index(header))
 
         # If not found in second row, try first row as a fallback
         if col_idx is None:
-            for i, h in enumerate(rows[0]):
-                if h and h.strip().lower() in ("academic_info_url", "academic info url", "academicinfo_url", "academicinfo url", "academic_infourl", "academicinfo", "url", "website"):
-                    col_idx = i
-                    break
+            col_idx = _url_column_index(_header_index(rows[0]))
 
         if col_idx is not None:
             for r in data_rows:
@@ -257,98 +409,72 @@ def main():
                         sval = sval.strip()
                         if sval:
                             urls.append(sval)
-    else:
-        # fallback: use get_all_records if sheet is small
-        records = ws.get_all_records()
-        for r in records:
-            for key in list(r.keys()):
-                if key and key.strip().lower() in ("academic_info_url", "academic info url", "academicinfo_url", "academicinfo url", "academic_infourl", "academicinfo", "url", "website"):
-                    val = r.get(key)
-                    if val is not None:
-                        sval = val if isinstance(val, str) else str(val)
-                        sval = sval.strip()
-                        if sval:
-                            urls.append(sval)
-                    break
 
     if not urls:
         p.error("No URLs found in the sheet's academic_info_url column.")
 
-    results = []
-    for idx, u in enumerate(urls, 1):
-        original_u = u
+    # URLs from the sheet are already stripped strings
+    targets = [(idx, u, _to_waf(u)) for idx, u in enumerate(urls, 1)]
+
+    fieldnames = ["url", "undergraduates", "in_state_tuition", "out_state_tuition", "avg_gpa", "error"]
+
+    # With --resume, rows already in the output without an error are kept and their URLs skipped; failed ones are retried
+    kept_rows = []
+    if args.resume and os.path.exists(args.out):
+        with open(args.out, newline="", encoding="utf-8") as f:
+            kept_rows = [row for row in csv.DictReader(f) if not row.get("error")]
+        done = {row.get("url") for row in kept_rows}
+        targets = [t for t in targets if t[2] not in done]
+        print(f"Resuming: {len(kept_rows)} rows kept from {args.out}, {len(targets)} URLs left to scrape")
+
+    # Pages are fetched concurrently; --delay now spaces out request starts per host instead of pausing the whole run
+    # Returns the result row plus the one status line printed for it
+    def scrape(target):
+        idx, original_u, target_url = target
+        _wait_for_host_slot(target_url, args.delay)
+        prefix = f"[{idx}/{len(urls)}]"
         try:
-            u_strip = u.strip()
-        except Exception:
-            u_strip = str(u)
-
-        target_url = u_strip
-        lower_u = u_strip.lower()
-
-        # If already starts with waf (with or without scheme), don't prepend again
-        if lower_u.startswith("https://waf.") or lower_u.startswith("http://waf.") or lower_u.startswith("waf."):
-            target_url = u_strip
-        # If starts with bare collegedata.com (no scheme, no waf), prepend waf with https
-        elif lower_u.startswith("collegedata.com"):
-            target_url = "https://waf." + u_strip
-        else:
-            parsed = urlparse(u_strip)
-            netloc = parsed.netloc or parsed.path
-            # If netloc endswith collegedata.com, ensure waf. prefix and https scheme
-            if netloc and netloc.lower().endswith("collegedata.com"):
-                if netloc.lower().startswith("waf."):
-                    # already has waf prefix; ensure https scheme
-                    scheme = "https"
-                    new_parsed = parsed._replace(scheme=scheme, netloc=netloc)
-                else:
-                    # avoid producing waf.www.collegedata.com — drop a leading www. before adding waf.
-                    base = netloc
-                    if base.lower().startswith("www."):
-                        base = base.split('.', 1)[1]
-                    new_netloc = "waf." + base
-                    scheme = "https"
-                    if parsed.netloc:
-                        new_parsed = parsed._replace(scheme=scheme, netloc=new_netloc)
-                    else:
-                        parts = parsed.path.split('/', 1)
-                        path = ('/' + parts[1]) if len(parts) > 1 else ''
-                        new_parsed = parsed._replace(scheme=scheme, netloc=new_netloc, path=path)
-                target_url = new_parsed.geturl()
-
-        print(f"[{idx}/{len(urls)}] Scraping: {target_url} (source: {original_u})")
-        try:
-            res = extract_from_url(target_url)
-            results.append(res)
-            # Print successful scrape result immediately
-            print(f"OK: url: {res.get('url')}, undergraduates: {res.get('undergraduates')}, in_state: {res.get('in_state_tuition')}, out_state: {res.get('out_state_tuition')}, avg_gpa: {res.get('avg_gpa')}")
+            body = fetch_page(target_url)
+            res = parse_pool.submit(parse_page, target_url, body).result()
+            return res, f"{prefix} OK: url: {res.get('url')} (source: {original_u}), undergraduates: {res.get('undergraduates')}, in_state: {res.get('in_state_tuition')}, out_state: {res.get('out_state_tuition')}, avg_gpa: {res.get('avg_gpa')}"
         except Exception as e:
-            print(f"Failed to scrape {target_url}: {e}")
-            results.append({
+            return {
                 "url": target_url,
                 "undergraduates": None,
                 "in_state_tuition": None,
                 "out_state_tuition": None,
                 "avg_gpa": None,
                 "error": str(e),
-            })
-        time.sleep(args.delay)
+            }, f"{prefix} Failed to scrape {target_url} (source: {original_u}): {e}"
+
+    # Each row is written and flushed as soon as its page finishes, so an interrupted run keeps what it scraped.
+    # Its status line is printed under the same lock: one write per URL, and threads can't interleave their output.
+    out_lock = threading.Lock()
+
+    def scrape_and_record(target):
+        res, status = scrape(target)
+        with out_lock:
+            writer.writerow(res)
+            out_f.flush()
+            print(status)
+        return res
+
+    with open(args.out, "w", newline="", encoding="utf-8") as out_f:
+        writer = csv.DictWriter(out_f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(kept_rows)
+        out_f.flush()
+
+        # Threads wait on the network; the lxml parse is CPU-bound, so it is handed to processes to use every core
+        with ProcessPoolExecutor(max_workers=args.parse_workers) as parse_pool:
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                results = list(executor.map(scrape_and_record, targets))
 
     # Print first 10 rows (url, undergraduates, tuitions, gpa)
     print('\nFirst 10 results:')
     for r in results[:10]:
         print(f"url: {r.get('url')}, undergraduates: {r.get('undergraduates')}, in_state_tuition: {r.get('in_state_tuition')}, out_state_tuition: {r.get('out_state_tuition')}, avg_gpa: {r.get('avg_gpa')}")
 
-    # Write results to CSV
-    fieldnames = ["url", "undergraduates", "in_state_tuition", "out_state_tuition", "avg_gpa"]
-    # include error column if present
-    if any("error" in r for r in results):
-        fieldnames.append("error")
-
-    with open(args.out, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in results:
-            writer.writerow(r)
 
 def _canonical_url_for_sheet(u: str) -> str:
     if not u:
@@ -369,11 +495,11 @@ def _canonical_url_for_sheet(u: str) -> str:
         s = s[:-1]
     return s
 
-def _update_cell_with_retries(ws, row: int, col: int, value, retries: int = 4, backoff: float = 1.0) -> bool:
-    """Update a sheet cell with retry/backoff. Returns True if update succeeded."""
+def _batch_update_with_retries(ws, updates: list, retries: int = 4, backoff: float = 1.0) -> bool:
+    """Send queued {range, values} cell updates in one request with retry/backoff. Returns True if it succeeded."""
     for attempt in range(1, retries + 1):
         try:
-            ws.update_cell(row, col, value)
+            ws.batch_update(updates, value_input_option="USER_ENTERED")
             return True
         except Exception:
             if attempt == retries:
@@ -401,7 +527,8 @@ def write_results_to_sheet(csv_path: str, creds_file: str = "cspscraping.json",
     except Exception:
         ws = sh.sheet1
 
-    sheet_values = ws.get_all_values()
+    # values.get trims trailing empty cells, so rows come back ragged
+    sheet_values = ws.get()
     if len(sheet_values) >= 2:
         header = sheet_values[1]
         data_rows = sheet_values[2:]
@@ -411,46 +538,52 @@ def write_results_to_sheet(csv_path: str, creds_file: str = "cspscraping.json",
         data_rows = sheet_values[1:]
         data_start_idx = 1
 
+    # pad the header to the widest row so new result columns are appended past any existing data
+    sheet_width = max((len(r) for r in sheet_values), default=0)
+    header = list(header) + [""] * (sheet_width - len(header))
+
     if verbose:
         print(f"Sheet '{sheet_name}' read: {len(sheet_values)} total rows (including header rows)")
 
     # find academic_info_url column index
-    url_col_idx = None
-    for i, h in enumerate(header):
-        if h and h.strip().lower() in ("academic_info_url", "academic info url", "academicinfo_url", "academicinfo url", "academic_infourl", "academicinfo", "url", "website"):
-            url_col_idx = i
-            break
+    header_idx = _header_index(header)
+    url_col_idx = _url_column_index(header_idx)
     if url_col_idx is None:
         raise RuntimeError("Could not find academic_info_url column in sheet header")
     if verbose:
         print(f"Detected academic_info_url at column index: {url_col_idx}")
 
+    # Every cell write is queued here (last write per cell wins) and sent in a single batch update at the end
+    pending_cells = {}
+
+    def queue_cell(row: int, col: int, value):
+        pending_cells[(row, col)] = value
+
     # ensure result columns exist in sheet header (use exact sheet column names)
     result_sheet_cols = ["undergraduates", "in_state_tuition", "out_of_state_tuition", "avg_admission_gpa"]
-    header_lower = [(h.lower() if h else '') for h in header]
     col_indices = {}
     for rc in result_sheet_cols:
-        if rc in header_lower:
-            col_indices[rc] = header_lower.index(rc)
+        if rc in header_idx:
+            col_indices[rc] = header_idx[rc]
         else:
             new_col = len(header)
             header.append(rc)
-            header_lower.append(rc)
+            header_idx[rc] = new_col
             col_indices[rc] = new_col
             # write header cell to sheet (header row is data_start_idx)
-            _update_cell_with_retries(ws, data_start_idx, new_col + 1, rc)
+            queue_cell(data_start_idx, new_col + 1, rc)
             if verbose:
                 print(f"Added sheet header column '{rc}' at index {new_col}")
 
     # ensure duplicate column exists in sheet
     dup_col_name = "duplicate_url"
-    if dup_col_name in header_lower:
-        dup_col_idx = header_lower.index(dup_col_name)
+    if dup_col_name in header_idx:
+        dup_col_idx = header_idx[dup_col_name]
     else:
         dup_col_idx = len(header)
         header.append(dup_col_name)
-        header_lower.append(dup_col_name)
-        _update_cell_with_retries(ws, data_start_idx, dup_col_idx + 1, dup_col_name)
+        header_idx[dup_col_name] = dup_col_idx
+        queue_cell(data_start_idx, dup_col_idx + 1, dup_col_name)
         if verbose:
             print(f"Added duplicate indicator column '{dup_col_name}' at index {dup_col_idx}")
 
@@ -473,7 +606,7 @@ def write_results_to_sheet(csv_path: str, creds_file: str = "cspscraping.json",
     # find CSV url column
     csv_url_col = None
     for c in (reader.fieldnames or []):
-        if c and c.strip().lower() in ("url", "academic_info_url", "academic info url", "academicinfo_url", "academicinfo url", "academic_infourl", "website"):
+        if c and c.strip().lower() in URL_COLUMN_ALIASES:
             csv_url_col = c
             break
     if csv_url_col is None:
@@ -481,11 +614,15 @@ def write_results_to_sheet(csv_path: str, creds_file: str = "cspscraping.json",
     if verbose:
         print(f"Using CSV URL column: {csv_url_col}")
 
+    # canonicalize each CSV URL once; reused for duplicate counts and sheet lookups
+    canon_list = [
+        _canonical_url_for_sheet(raw_url) if raw_url is not None else ""
+        for raw_url in (crow.get(csv_url_col) for crow in csv_rows)
+    ]
+
     # build canonical counts to detect duplicates
     can_counts = {}
-    for crow in csv_rows:
-        raw_url = crow.get(csv_url_col)
-        can = _canonical_url_for_sheet(raw_url) if raw_url is not None else ""
+    for can in canon_list:
         if not can:
             continue
         can_counts[can] = can_counts.get(can, 0) + 1
@@ -501,9 +638,8 @@ def write_results_to_sheet(csv_path: str, creds_file: str = "cspscraping.json",
         print(f"Found {len(sheet_map)} matching sheet rows with canonical URLs")
 
     # process CSV rows and update sheet
-    for crow in csv_rows:
+    for crow, can in zip(csv_rows, canon_list):
         raw_url = crow.get(csv_url_col)
-        can = _canonical_url_for_sheet(raw_url) if raw_url is not None else ""
         row_idx = sheet_map.get(can)
         if row_idx is None:
             # no matching sheet row; check for duplicates
@@ -512,7 +648,7 @@ def write_results_to_sheet(csv_path: str, creds_file: str = "cspscraping.json",
                 # duplicate found; mark all duplicates in sheet
                 print(f"Duplicate URL detected in CSV: {raw_url} (canonical: {can})")
                 for dup_row_idx in sheet_map.values():
-                    _update_cell_with_retries(ws, dup_row_idx, dup_col_idx + 1, "Duplicate")
+                    queue_cell(dup_row_idx, dup_col_idx + 1, "Duplicate")
                 updates += 1
             else:
                 print(f"No sheet row found for CSV URL: {raw_url} (canonical: {can})")
@@ -526,18 +662,25 @@ def write_results_to_sheet(csv_path: str, creds_file: str = "cspscraping.json",
                 # special case for tuition: convert to float if it's a currency string
                 if "tuition" in csv_col.lower():
                     csv_val = parse_currency(csv_val)
-                _update_cell_with_retries(ws, row_idx, col_indices[sheet_col] + 1, csv_val)
+                queue_cell(row_idx, col_indices[sheet_col] + 1, csv_val)
                 updated = True
 
         if updated:
             # mark duplicate column if there are duplicates
             can_count = can_counts.get(can, 0)
             if can_count > 1:
-                _update_cell_with_retries(ws, row_idx, dup_col_idx + 1, "Duplicate")
+                queue_cell(row_idx, dup_col_idx + 1, "Duplicate")
             else:
-                _update_cell_with_retries(ws, row_idx, dup_col_idx + 1, "")
+                queue_cell(row_idx, dup_col_idx + 1, "")
             updates += 1
 
+    cell_updates = [
+        {"range": gspread.utils.rowcol_to_a1(row, col), "values": [[value]]}
+        for (row, col), value in pending_cells.items()
+    ]
+    if cell_updates and not _batch_update_with_retries(ws, cell_updates):
+        raise RuntimeError(f"Failed to write {len(cell_updates)} cell updates to sheet '{sheet_name}'")
+
     if updates > 0:
         print(f"Sheet updated: {updates} rows modified")
     else:
@@ -1,9 +1,14 @@
 import os
+import functools
+import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree, html as lxml_html
+from concurrent.futures import ThreadPoolExecutor
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from playwright.sync_api import sync_playwright
-from geocode_utils import get_lat_long
+from geocode_utils import get_lat_long_many
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.oauth2.service_account import Credentials
@@ -86,9 +91,20 @@ URLS = [
     "https://exactsports.com/events/2916/soccer/girls/x1-showcase-camp-san-francisco-girls-06-2025",
     "https://exactsports.com/events/3033/soccer/boys/x1-showcase-camp-san-francisco-boys-07-2025",
 ]
-# GRADES_XPATH = "/html/body/section[1]/div[2]/div/div[2]/div[1]/div[2]/div[1]/div[2]/p"
-# COST_XPATH = "//*[@id='registration-widget']/div[2]/div[2]/div[2]/h1/span"
-# ADDRESS_XPATH = "/html/body/section[1]/div[2]/div/div[2]/div[1]/div[2]/div[1]/div[3]/a"
+# Drop repeated URLs (keeping order) so no page is scraped twice
+URLS = list(dict.fromkeys(URLS))
+GRADES_XPATH = "/html/body/section[1]/div[2]/div/div[2]/div[1]/div[2]/div[1]/div[2]/p"
+COST_XPATH = "//*[@id='registration-widget']/div[2]/div[2]/div[2]/h1/span"
+ADDRESS_XPATH = "/html/body/section[1]/div[2]/div/div[2]/div[1]/div[2]/div[1]/div[3]/a"
+CAMP_FIELD_XPATHS = {"address": ADDRESS_XPATH, "grades": GRADES_XPATH, "cost": COST_XPATH}
+# Returns {field: innerText of the first node matching its XPath, or null}
+READ_FIELDS_JS = """xpaths => Object.fromEntries(Object.entries(xpaths).map(([field, xpath]) => {
+    const node = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return [field, node ? node.innerText : null];
+}))"""
+# Shared by every static-HTML parse. Pages are UTF-8, and comments never hold camp fields, so they are dropped.
+# Blank text is kept because text_content() relies on it to space out inline elements.
+CAMP_HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8", remove_comments=True)
 # REGISTRATION_LINK_XPATH = "//*[@id='registration-widget']/div[2]/div[1]/div[3]/a"
 # OVERVIEW_TITLE_XPATH = "//*[@id='overview-container']"
 
@@ -99,24 +115,89 @@ TAB_NAME = "Camps"
 CREDS_FILE = "cspscraping.json"
 
 scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-creds = ServiceAccountCredentials.from_json_keyfile_name(CREDS_FILE, scope) # type: ignore
-client = gspread.authorize(creds) # type: ignore
 
-try:
-    sheet = client.open_by_key(SHEET_ID).worksheet(TAB_NAME)
-    print(f"Successfully accessed sheet: {sheet.title}")
-except gspread.exceptions.SpreadsheetNotFound:
-    print("Error: The SHEET_ID is invalid or the service account does not have access.")
+@functools.lru_cache(maxsize=1)
+def get_sheet():
+    """
+    Authorizes gspread and opens the camps worksheet on first use, so importing this module needs no network or credentials.
+
+    Returns:
+        gspread.Worksheet or None: The worksheet, or None if the spreadsheet can't be accessed.
+    """
+    creds = Credentials.from_service_account_file(CREDS_FILE, scopes=scope)
+    client = gspread.authorize(creds)
+
+    try:
+        sheet = client.open_by_key(SHEET_ID).worksheet(TAB_NAME)
+        print(f"Successfully accessed sheet: {sheet.title}")
+        return sheet
+    except gspread.exceptions.SpreadsheetNotFound:
+        print("Error: The SHEET_ID is invalid or the service account does not have access.")
+        return None
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 }
 
-def get_camp_data(url):
+SESSION = requests.Session()
+_retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET", "HEAD"])
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=_retry)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update(HEADERS)
+
+# Pages scraped per Chromium launch before it is relaunched to cap its memory growth
+PAGES_PER_BROWSER = 20
+# Browsers loading camp pages at once; each is a full Chromium process, so keep this small
+BROWSER_WORKERS = 4
+# Requests aborted while rendering camp pages; none of them affect the scraped text. Stylesheets still load because
+# inner_text depends on layout.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+def _block_assets(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+def _normalize_field_text(text):
+    """Collapses runs of whitespace so a field reads the same whether it came from the static HTML or the browser."""
+    return " ".join(text.split())
+
+def get_camp_data_http(url):
+    """
+    Reads the camp fields straight from the server-rendered HTML, without a browser.
+
+    Args:
+        url (str): The URL of the webpage.
+
+    Returns:
+        dict or None: The camp data, or None if the request fails, the body can't be parsed, or any field isn't in the static HTML.
+    """
+    try:
+        res = SESSION.get(url, timeout=10)
+        res.raise_for_status()
+    except requests.RequestException:
+        return None
+
+    try:
+        tree = lxml_html.fromstring(res.content, parser=CAMP_HTML_PARSER)
+    except (etree.ParserError, ValueError):  # empty body, or nothing but comments; let the browser try
+        return None
+    camp_data = {"url": url}
+    for field, xpath in CAMP_FIELD_XPATHS.items():
+        matches = tree.xpath(xpath)
+        if not matches:
+            return None
+        camp_data[field] = _normalize_field_text(matches[0].text_content())
+    return camp_data
+
+def get_camp_data(browser, url):
     """
     Extracts camp data from a webpage using Playwright and converts it into a pandas DataFrame.
 
     Args:
+        browser: A launched Playwright browser; each call opens and closes its own context on it.
         url (str): The URL of the webpage.
 
     Returns:
@@ -124,29 +205,83 @@ def get_camp_data(url):
     """
     camp_data = {}
 
-    with sync_playwright() as p:
-        # Set a custom user agent to avoid request blocks and extend timeouts
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(user_agent=HEADERS["User-Agent"])
-        page = context.new_page()
+    # Set a custom user agent to avoid request blocks and extend timeouts
+    context = browser.new_context(user_agent=HEADERS["User-Agent"])
+    # Route handlers live as long as the context, which is closed after this page
+    context.route("**/*", _block_assets)
+    page = context.new_page()
 
+    try:
+        # The fields are in the DOM long before ads and trackers go idle; wait for the address element instead
+        page.goto(url, timeout=15_000, wait_until="domcontentloaded")
+        # Wait for the camp data to load
+        page.wait_for_selector(f"xpath={ADDRESS_XPATH}", timeout=10_000)
+
+        # Extract camp data in one round trip to the page
+        fields = page.evaluate(READ_FIELDS_JS, CAMP_FIELD_XPATHS)
+        missing = [field for field, text in fields.items() if text is None]
+        if missing:
+            raise ValueError(f"fields not found: {', '.join(missing)}")
+        camp_data["url"] = url
+        camp_data.update((field, _normalize_field_text(text)) for field, text in fields.items())
+    except Exception as e:
+        print(f"Error extracting {url}: {e}")
+        camp_data = {"url": url, "address": "", "grades": "", "cost": ""}
+    finally:
+        context.close()
+
+    return camp_data
+
+def _scrape_with_browser(urls):
+    """Scrapes the URLs in order, launching a browser only for pages the static HTML can't answer."""
+    data = []
+    with sync_playwright() as p:
+        browser = None
+        browser_pages = 0
         try:
-            page.goto(url, timeout=60_000, wait_until="networkidle")
-            # Wait for the camp data to load
-            page.wait_for_selector(f"xpath={ADDRESS_XPATH}", timeout=10_000)
-
-            # Extract camp data
-            camp_data["url"] = url
-            camp_data["address"] = page.locator(f"xpath={ADDRESS_XPATH}").inner_text()
-            camp_data["grades"] = page.locator(f"xpath={GRADES_XPATH}").inner_text()
-            camp_data["cost"] = page.locator(f"xpath={COST_XPATH}").inner_text()
-        except Exception as e:
-            print(f"Error extracting {url}: {e}")
-            camp_data = {"url": url, "address": "", "grades": "", "cost": ""}
+            for url in urls:
+                # Print the URL being processed
+                print("Trying to extract data from:", url)
+                camp_data = get_camp_data_http(url)
+                if camp_data is None:
+                    # Relaunch every PAGES_PER_BROWSER rendered pages
+                    if browser is None or browser_pages == PAGES_PER_BROWSER:
+                        if browser is not None:
+                            browser.close()
+                        browser = p.chromium.launch(headless=True)
+                        browser_pages = 0
+                    camp_data = get_camp_data(browser, url)
+                    browser_pages += 1
+                data.append(camp_data)
         finally:
-            browser.close()
+            if browser is not None:
+                browser.close()
+    return data
 
-    return camp_data
+def scrape_camp_pages(urls, workers=BROWSER_WORKERS):
+    """
+    Runs get_camp_data over every URL, overlapping page loads across a few browsers.
+
+    Playwright's sync objects can't be shared between threads, so each worker thread drives its own browser over
+    every workers-th URL.
+
+    Args:
+        urls (list of str): The camp page URLs.
+        workers (int): Number of browsers scraping at once.
+
+    Returns:
+        list of dict: One camp data dict per URL, in order.
+    """
+    if not urls:
+        return []
+    workers = max(1, min(workers, len(urls)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        chunk_results = list(executor.map(_scrape_with_browser, [urls[i::workers] for i in range(workers)]))
+
+    data = [None] * len(urls)
+    for i, chunk_data in enumerate(chunk_results):
+        data[i::workers] = chunk_data
+    return data
 
 def extract_event_details(url):
     """
@@ -160,19 +295,20 @@ def extract_event_details(url):
     """
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(url, wait_until="networkidle")
-
-        # Wait for the event details container to load
-        page.wait_for_selector("#registration-widget")
+        try:
+            page = browser.new_page()
+            page.goto(url, wait_until="domcontentloaded")
 
-        # Extract location
-        location = page.locator("#registration-widget .event-row a").inner_text()
+            # Wait for the event details container to load
+            page.wait_for_selector("#registration-widget")
 
-        # Extract early bird price
-        early_bird_price = page.locator("#registration-widget .event-price-row:nth-child(2) h1 span").inner_text()
+            # Extract location
+            location = page.locator("#registration-widget .event-row a").inner_text()
 
-        browser.close()
+            # Extract early bird price
+            early_bird_price = page.locator("#registration-widget .event-price-row:nth-child(2) h1 span").inner_text()
+        finally:
+            browser.close()
 
     return {
         "location": location.strip(),
@@ -223,21 +359,20 @@ def geocode_addresses_in_sheet(sheet_id, tab_name, start_row, end_row):
         print(f"An error occurred: {error}")
         rows = []
 
-    # Geocode addresses
-    for i, row in enumerate(rows):
-        if len(row) > 0:  # Ensure the row has data
-            address = row[0]  # Assuming the address is in the first column
-            lat, lng, city = get_lat_long(address)
-            rows[i].extend([lat, lng])
+    # Geocode the addresses (first column) of non-empty rows; repeated addresses are looked up once
+    addresses = [row[0] for row in rows if len(row) > 0]
+    coords = iter(get_lat_long_many(addresses))
+    # Only the lat/long pairs go to AA:AB, one per row read (blank for empty rows) so they stay aligned
+    values = [list(next(coords)[:2]) if len(row) > 0 else ["", ""] for row in rows]
 
-    # Write results back to the spreadsheet
+    # Write results back to the spreadsheet in a single update
     update_range = f"{tab_name}!AA{start_row}:AB{end_row}"  # Adjust column range for lat/long
     try:
         sheet.values().update(
             spreadsheetId=sheet_id,
             range=update_range,
             valueInputOption="RAW",
-            body={"values": rows}
+            body={"values": values}
         ).execute()
         print("Geocoding complete. Results written back to the spreadsheet.")
     except HttpError as error:
@@ -248,12 +383,7 @@ def main():
     Main function to create a DataFrame with one row per URL in URLS.
     Extracts address, grades, and cost for each URL and writes the DataFrame to a CSV file.
     """
-    # data = []
-    # for url in URLS:
-        
-    #     # Print the URL being processed
-    #     print("Trying to extract data from:", url)
-    #     data.append(get_camp_data(url))
+    # data = scrape_camp_pages(URLS)
 
     # output_file = "exact_sports_camps.csv"
     # df = create_dataframe_and_write_to_csv(data, output_file)
@@ -1,5 +1,10 @@
 import os
+import dbm
+import shelve
+import threading
+import functools
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from googlemaps import Client as GoogleMaps
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -8,10 +13,47 @@ if not GOOGLE_API_KEY:
 
 gmaps = GoogleMaps(key=GOOGLE_API_KEY)
 
+# Concurrent geocoding requests in get_lat_long_many
+GEOCODE_WORKERS = 16
+
+# Geocoding results keyed by normalized place, kept across runs; a lock serializes access since lookups run in threads
+GEOCODE_CACHE_PATH = os.path.join("data", "geocode_cache")
+_geocode_cache_lock = threading.Lock()
+
+def _cache_get(place: str):
+    try:
+        with _geocode_cache_lock, shelve.open(GEOCODE_CACHE_PATH, flag="r") as db:
+            return db.get(place)
+    except dbm.error:  # includes OSError, e.g. before the cache file exists
+        return None
+
+def _cache_set(place: str, geo) -> None:
+    try:
+        os.makedirs(os.path.dirname(GEOCODE_CACHE_PATH), exist_ok=True)
+        with _geocode_cache_lock, shelve.open(GEOCODE_CACHE_PATH) as db:
+            db[place] = geo
+    except dbm.error as e:
+        print(f"Failed to write geocode cache entry for {place}: {e}")
+
+def _normalize_place(place: str) -> str:
+    """Cache key for a place: lowercased with runs of whitespace collapsed, so spacing variants share an entry."""
+    return " ".join(place.split()).lower()
+
+@functools.lru_cache(maxsize=4096)
+def _geocode(place: str):
+    """Geocode a normalized place name once per process, and only once ever if the disk cache has it; organisers repeat across camps."""
+    geo = _cache_get(place)
+    if geo is None:
+        geo = gmaps.geocode(place)
+        # Empty answers can be transient, so only hits go to disk; a miss is retried on the next run
+        if geo:
+            _cache_set(place, geo)
+    return geo
+
 def get_lat_long(place: str):
     """Return (lat, lng, city) for a place using Google Maps geocoding."""
     try:
-        geo = gmaps.geocode(place.strip())
+        geo = _geocode(_normalize_place(place))
         if geo:
             print(f"Geocoding {place}...")
             loc = geo[0]["geometry"]["location"]
@@ -21,11 +63,19 @@ def get_lat_long(place: str):
                     city = component["long_name"]
                     break
             return loc["lat"], loc["lng"], city
-            print(f"Geocoded {place}: {loc['lat']}, {loc['lng']}, {city}")
     except Exception:
         print(f"Error geocoding {place}.")
     return "", "", ""
 
+def get_lat_long_many(places):
+    """Return get_lat_long(place) for each place, geocoding each distinct place once and the distinct ones concurrently."""
+    keys = [_normalize_place(place) if isinstance(place, str) else place for place in places]
+    # One representative per normalized place; get_lat_long normalizes it the same way
+    unique = dict(zip(keys, places))
+    with ThreadPoolExecutor(max_workers=GEOCODE_WORKERS) as executor:
+        found = dict(zip(unique, executor.map(get_lat_long, unique.values())))
+    return [found[key] for key in keys]
+
 def geocode_csv(input_csv: str, output_csv: str):
     """Geocode addresses from an input CSV and write results to an output CSV."""
     # Load input CSV
@@ -33,18 +83,14 @@ def geocode_csv(input_csv: str, output_csv: str):
     if "address" not in df.columns:
         raise ValueError("Input CSV must contain an 'address' column")
 
-    # Prepare output columns
-    df["latitude"] = ""
-    df["longitude"] = ""
-    df["city"] = ""
-
-    # Geocode each address
-    for index, row in df.iterrows():
-        address = row["address"]
-        lat, lng, city = get_lat_long(address)
-        df.at[index, "latitude"] = lat
-        df.at[index, "longitude"] = lng
-        df.at[index, "city"] = city
+    # Geocode each distinct address once; repeats share the result
+    results = get_lat_long_many(df["address"].tolist())
+
+    # Assign whole output columns at once
+    lats, lngs, cities = zip(*results) if results else ((), (), ())
+    df["latitude"] = list(lats)
+    df["longitude"] = list(lngs)
+    df["city"] = list(cities)
 
     print (f"Geocoded {len(df)} addresses.")
     
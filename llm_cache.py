@@ -0,0 +1,57 @@
+import hashlib
+import os
+import struct
+import tempfile
+from datetime import datetime, timezone
+
+import orjson
+
+# Parsed LLM extractions, one JSON file per content hash
+CACHE_DIR = os.path.join("data", "llm_cache")
+
+
+def make_key(*parts: str) -> str:
+    """Return the sha256 hex digest of the given parts, each prefixed with its 8-byte length so fields can't run together."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8")
+        digest.update(struct.pack(">Q", len(data)))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def get(key: str):
+    """Return the cached value for key, or None on a miss or unreadable entry."""
+    try:
+        with open(_path(key), "rb") as f:
+            return orjson.loads(f.read())["value"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def put(key: str, value, model: str = "") -> None:
+    """Store value under key along with the model and a UTC timestamp.
+
+    Writes go through a temp file so concurrent readers never see a partial entry.
+    """
+    entry = {"value": value, "model": model, "created_at": datetime.now(timezone.utc).isoformat()}
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(entry, option=orjson.OPT_SORT_KEYS))
+            os.replace(tmp_path, _path(key))
+        except BaseException:
+            # Don't leave a half-written temp file behind in the cache directory
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    except OSError as e:
+        print(f"Failed to write LLM cache entry {key}: {e}")
@@ -1,8 +1,10 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree, html as lxml_html
 import pandas as pd
 from dateutil import parser as dateparser
-import json
+import orjson
 import re
 from typing import List, Dict, Any
 
@@ -11,6 +13,18 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 }
 
+AGES_RE = re.compile(r"ages?\s*([0-9\-\+]+)", re.I)
+LD_JSON_XPATH = etree.XPath('//script[@type="application/ld+json"]')
+# JSON-LD is UTF-8, and lxml would otherwise fall back to Latin-1 on pages without a meta charset
+UTF8_HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+SESSION = requests.Session()
+_retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET", "HEAD"])
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=_retry)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update(HEADERS)
+
 def to_unix(dt_str: str) -> int:
     """Convert a date string to a unix timestamp."""
     try:
@@ -35,14 +49,14 @@ def extract_division(text: str) -> str:
     return ""
 
 def scrape_events(url: str) -> List[Dict[str, Any]]:
-    resp = requests.get(url, headers=HEADERS)
+    resp = SESSION.get(url, timeout=10)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+    tree = lxml_html.fromstring(resp.content, parser=UTF8_HTML_PARSER)
 
     events = []
-    for script in soup.find_all("script", type="application/ld+json"):
+    for script in LD_JSON_XPATH(tree):
         try:
-            data = json.loads(script.string)
+            data = orjson.loads(script.text)
         except Exception:
             continue
 
@@ -67,7 +81,7 @@ def scrape_events(url: str) -> List[Dict[str, Any]]:
             division = extract_division(description)
             offers = item.get("offers", {})
             cost = offers.get("price") if isinstance(offers, dict) else ""
-            ages = re.search(r"ages?\s*([0-9\-\+]+)", description, re.I)
+            ages = AGES_RE.search(description)
             ages = ages.group(1) if ages else ""
 
             events.append({
@@ -1,97 +1,119 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import csv
-from geocode_utils import get_lat_long
+import re
+from geocode_utils import get_lat_long_many
 import time
 from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "https://www.ussportscamps.com"
 START_URL = f"{BASE_URL}/soccer/nike"
+CAMP_WORKERS = 8  # Concurrent camp page fetches
+# Any number in an ages string, whatever dash or "+" surrounds it
+AGE_RE = re.compile(r"\d+")
+# (youngest, oldest, label) for each grade level, in output order
+GRADE_LEVELS = ((2, 12, "Elementary School"), (13, 14, "Middle School"), (15, 18, "High School"))
+
+# Shared session so every camp page on ussportscamps.com reuses a pooled keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"})
+_retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=CAMP_WORKERS, max_retries=_retry)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
 
 def classify_grade_level(ages):
-    grade_levels = []
-    age_list = [int(s.strip()) for s in ages.replace('+', '').split('–') if s.strip().isdigit()]
-    if any(2 <= age <= 12 for age in age_list):
-        grade_levels.append("Elementary School")
-    if any(13 <= age <= 14 for age in age_list):
-        grade_levels.append("Middle School")
-    if any(15 <= age <= 18 for age in age_list):
-        grade_levels.append("High School")
-    return ", ".join(grade_levels)
+    # One bit per grade level, set by a single pass over the listed ages
+    flags = 0
+    for age in {int(n) for n in AGE_RE.findall(ages)}:
+        for bit, (low, high, _) in enumerate(GRADE_LEVELS):
+            if low <= age <= high:
+                flags |= 1 << bit
+    return ", ".join(label for bit, (_, _, label) in enumerate(GRADE_LEVELS) if flags & (1 << bit))
+
+def scrape_camp(camp_url):
+    """Scrape one camp page into a camp row. Lat/Long are left blank for scrape_state_camps to fill in."""
+    camp_resp = SESSION.get(camp_url, timeout=10)
+    camp_soup = BeautifulSoup(camp_resp.content, 'lxml')
+
+    title = camp_soup.find('h1')
+    title = title.text.strip() if title else "Unknown Camp Name"
+
+    city_state = camp_soup.select_one('.location')
+    city, state = "", ""
+    if city_state:
+        parts = city_state.text.strip().split(',')
+        city = parts[0].strip()
+        if len(parts) > 1:
+            state = parts[1].strip()
+
+    # Walk the page's visible text once and lowercase it once; the three lookups below scan this list
+    texts = [(t, t.lower()) for t in camp_soup.strings if t.strip()]
+
+    age = "Not listed"
+    age_tag = next((t for t, lower in texts if "ages" in lower), None)
+    if age_tag:
+        age = age_tag.strip().split(':')[-1].strip()
+
+    date = "Not listed"
+    date_tag = next((t for t, lower in texts if "date" in lower), None)
+    if date_tag:
+        date = date_tag.strip().split(':')[-1].strip()
+    start_date, end_date = "", ""
+    if 'to' in date:
+        start_date, end_date = [d.strip() for d in date.split('to')]
+
+    cost = "Not listed"
+    cost_tag = next((t for t, _ in texts if "$" in t), None)
+    if cost_tag:
+        cost = cost_tag.strip()
+
+    gender = "Coed"
+    if "boys" in title.lower():
+        gender = "Boys"
+    elif "girls" in title.lower():
+        gender = "Girls"
+
+    grade_level = classify_grade_level(age)
+
+    return {
+        "Camp Name": title,
+        "Camp Organizer": "Nike",
+        "Camp Type": "collaborative",
+        "Image": "",
+        "URL": camp_url,
+        "Lat": "",
+        "Long": "",
+        "Start_date": start_date,
+        "End_date": end_date,
+        "City": city,
+        "State": state,
+        "Grade Level": grade_level,
+        "Ages": age,
+        "Division": "",
+        "Cost": cost,
+        "Gender": gender
+    }
 
 def scrape_state_camps():
-    response = requests.get(START_URL)
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    camps = []
+    response = SESSION.get(START_URL, timeout=10)
+    soup = BeautifulSoup(response.content, 'lxml')
 
     # All clickable camp links on the main page
     links = soup.select('dl.locations-list a')
-    for link in links:
-        href = link.get('href')
-        if not href:
-            continue
-        camp_url = urljoin(BASE_URL, str(href))
-        camp_resp = requests.get(camp_url)
-        camp_soup = BeautifulSoup(camp_resp.text, 'html.parser')
-
-        title = camp_soup.find('h1')
-        title = title.text.strip() if title else "Unknown Camp Name"
-
-        city_state = camp_soup.select_one('.location')
-        city, state = "", ""
-        if city_state:
-            parts = city_state.text.strip().split(',')
-            city = parts[0].strip()
-            if len(parts) > 1:
-                state = parts[1].strip()
-
-        age = "Not listed"
-        age_tag = camp_soup.find(text=lambda t: "ages" in t.lower())
-        if age_tag:
-            age = age_tag.strip().split(':')[-1].strip()
-
-        date = "Not listed"
-        date_tag = camp_soup.find(text=lambda t: "date" in t.lower())
-        if date_tag:
-            date = date_tag.strip().split(':')[-1].strip()
-        start_date, end_date = "", ""
-        if 'to' in date:
-            start_date, end_date = [d.strip() for d in date.split('to')]
-
-        cost = "Not listed"
-        cost_tag = camp_soup.find(text=lambda t: "$" in t)
-        if cost_tag:
-            cost = cost_tag.strip()
-
-        gender = "Coed"
-        if "boys" in title.lower():
-            gender = "Boys"
-        elif "girls" in title.lower():
-            gender = "Girls"
-
-        full_location = f"{title}, {city}, {state}"
-        lat, lon = get_lat_long(full_location)
-        grade_level = classify_grade_level(age)
-
-        camps.append({
-            "Camp Name": title,
-            "Camp Organizer": "Nike",
-            "Camp Type": "collaborative",
-            "Image": "",
-            "URL": camp_url,
-            "Lat": lat,
-            "Long": lon,
-            "Start_date": start_date,
-            "End_date": end_date,
-            "City": city,
-            "State": state,
-            "Grade Level": grade_level,
-            "Ages": age,
-            "Division": "",
-            "Cost": cost,
-            "Gender": gender
-        })
+    camp_urls = [urljoin(BASE_URL, str(link.get('href'))) for link in links if link.get('href')]
+
+    # Camp pages are independent and network-bound, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=CAMP_WORKERS) as executor:
+        camps = list(executor.map(scrape_camp, camp_urls))
+
+    # Geocode once every page is in, as a separate pass; camps sharing a location are looked up once
+    full_locations = [f"{camp['Camp Name']}, {camp['City']}, {camp['State']}" for camp in camps]
+    for camp, (lat, lon, _) in zip(camps, get_lat_long_many(full_locations)):
+        camp["Lat"], camp["Long"] = lat, lon
 
     return camps
 
@@ -1,19 +1,23 @@
 # camp_scraper.py
 
 import requests
-from lxml import html
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import html, etree
 import pandas as pd
 import gspread
 import os
+import functools
 from urllib.parse import urlparse, urljoin
-import time
 from datetime import datetime
 from geocode_utils import get_lat_long
 import re
-from bs4 import BeautifulSoup
+from bs4 import UnicodeDammit
 import json
-import copy
-from difflib import SequenceMatcher
+import orjson
+from rapidfuzz import fuzz
+from concurrent.futures import ThreadPoolExecutor
+import llm_cache
 
 # CONFIG
 URLS = [
@@ -21,6 +25,29 @@ URLS = [
     "https://www.nsr-inc.com/sport/soccer/mens-college-soccer-camps.php"
 ]
 XPATH = "/html/body/section/div/div/div/div[1]/table"
+# Compiled once and reused for every table row
+TR_XPATH = etree.XPath(".//tr")
+TD_XPATH = etree.XPath(".//td")
+A_XPATH = etree.XPath(".//a")
+PROMPT_VERSION = "v1"  # Bump when the extraction prompt changes so cached LLM results are invalidated
+MAX_WORKERS = 10  # Concurrent camp page fetches; keeps us polite to the camp hosts
+LLM_WORKERS = 8  # Concurrent OpenRouter requests
+# Malformed or unexpected LLM output; network/HTTP failures are left to propagate once retries are exhausted
+LLM_PARSE_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+# What a single camp's LLM call can fail with in setup(); recorded on that camp's row so the batch survives
+LLM_CALL_ERRORS = LLM_PARSE_ERRORS + (requests.RequestException,)
+# A camp page lxml can't turn into a snippet; recorded on that camp's row
+PAGE_PARSE_ERRORS = (ValueError, etree.LxmlError)
+MAX_PAGE_BYTES = 1_000_000
+# Snippet pages are decoded by UnicodeDammit and handed to lxml re-encoded as UTF-8
+UTF8_HTML_PARSER = html.HTMLParser(encoding="utf-8")
+SNIPPET_CHARS = 3000  # ~750 tokens; plenty for Gemma-3n to find the camp dates and costs
+# A text block is worth sending to the LLM if it mentions any of these or contains a digit
+KEYWORD_RE = re.compile(r"camp|date|session|ages|\$|–|to|through|\d", re.IGNORECASE)
+# A page with none of these (month name, m/d, or a year) has no camp dates, so the LLM would only answer "no camp"
+DATE_RE = re.compile(r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\b|\b\d{1,2}/\d{1,2}\b|\b\d{4}\b", re.IGNORECASE)
+# Word tokens compared when matching camp names to university names
+WORD_RE = re.compile(r"\w+")
 SHEET_ID = os.getenv("SHEET_ID")
 if not SHEET_ID:
     raise EnvironmentError("SHEET_ID environment variable not set")
@@ -29,27 +56,39 @@ CREDS_FILE = "cspscraping.json"
 
 # Load sheet
 # Old oauth2client usage replaced with gspread.service_account which uses google-auth under the hood.
-# This also checks for the presence of the credentials file and raises a clear error if it's missing.
-if not os.path.exists(CREDS_FILE):
-    raise FileNotFoundError(f"Google credentials file '{CREDS_FILE}' not found. Place your service account JSON there or set CREDS_FILE variable to its path.")
+# Authorization is deferred to first use so importing this module doesn't hit the Google APIs.
+@functools.lru_cache(maxsize=1)
+def get_client():
+    # Check for the presence of the credentials file and raise a clear error if it's missing.
+    if not os.path.exists(CREDS_FILE):
+        raise FileNotFoundError(f"Google credentials file '{CREDS_FILE}' not found. Place your service account JSON there or set CREDS_FILE variable to its path.")
+    return gspread.service_account(filename=CREDS_FILE)
 
-client = gspread.service_account(filename=CREDS_FILE)
-sheet = client.open_by_key(SHEET_ID).worksheet(TAB_NAME)
+
+@functools.lru_cache(maxsize=1)
+def get_sheet():
+    return get_client().open_by_key(SHEET_ID).worksheet(TAB_NAME)
 
 # Load GMaps Config (used via geocode_utils)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-def fill_columns(camp):
+# Shared session so repeat requests to the same host (OpenRouter especially) reuse the connection
+SESSION = requests.Session()
+_retry = Retry(total=5, backoff_factor=1.0, status_forcelist=[429, 500, 502, 503, 504], respect_retry_after_header=True, allowed_methods=frozenset(["GET", "POST"]))
+_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=_retry)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+def fetch_camp_page(camp):
+    """Load the camp's page and geocode its organiser. Returns the response, or None if the page did not load."""
 
     # 1. Ensure the camp link loads
     try:
-        addl_camps = []
-        
         if camp["Camp Info URL"]:
             
             # Parse the URL with headers
             headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
-            res = requests.get(camp["Camp Info URL"], headers=headers, timeout=10)
+            res = SESSION.get(camp["Camp Info URL"], headers=headers, timeout=10)
             
             # Ensure the page loads
             if res.status_code == 200:
@@ -57,16 +96,13 @@ def fill_columns(camp):
             else:
                 camp["Page Load?"] = f"Error {res.status_code}"
                 print(f"❌ Error {res.status_code} on URL: {camp['Camp Info URL']}")
-                return addl_camps
-            content = res.text.lower()
+                return None
             print("Retrieving data for URL", camp["Camp Info URL"])
 
             # 2. Use Geocoding API to get lat/lng based on organiser name
             lat, lng, city = get_lat_long(camp["Organiser"])
             camp["Lat"], camp["Long"], camp["City"] = lat, lng, city
-
-            # 3. Look for dates, ages, and prices using the LLM (OpenRouter)
-            addl_camps = get_llm_data(res, camp)
+            return res
 
         else:
             camp["Page Load?"] = "No Link"
@@ -74,26 +110,58 @@ def fill_columns(camp):
     except Exception as e:
         camp["Page Load?"] = f"Error: {e}"
         camp["Lat"] = camp["Long"] = camp["start_date"] = camp["end_date"] = ""
-    time.sleep(1)  # Avoid hammering servers
 
-    return addl_camps
+    return None
 
 
-def get_llm_data(res, camp):
-    soup = BeautifulSoup(res.text, "html.parser")
-    text_blocks = soup.find_all(["p", "li", "div"])
+def fill_columns(camp):
+    res = fetch_camp_page(camp)
+    if res is None:
+        return []
+
+    # 3. Look for dates, ages, and prices using the LLM (OpenRouter)
+    return get_llm_data(res, camp)
+
+
+def build_snippet(res):
+    """Return the camp-relevant text from a page, capped at SNIPPET_CHARS characters."""
+    # Camp details sit near the top of the page and the snippet is capped anyway, so oversized
+    # pages are only partly parsed. UnicodeDammit picks the encoding the way BeautifulSoup did
+    content = res.content[:MAX_PAGE_BYTES]
+    if not content.strip():
+        return ""
+    # Walk lxml's tree directly rather than building a soup over it; script, style and template
+    # text is dropped first, as BeautifulSoup's .text did. lxml refuses str input that carries an
+    # XML encoding declaration (XHTML pages), so the decoded markup goes back in as UTF-8 bytes
+    markup = UnicodeDammit(content, is_html=True).unicode_markup.encode("utf-8")
+    try:
+        tree = html.document_fromstring(markup, parser=UTF8_HTML_PARSER)
+    except etree.ParserError:  # nothing but comments or whitespace
+        return ""
+    etree.strip_elements(tree, "script", "style", "template", with_tail=False)
     relevant_lines = []
+    length = 0
+
+    # Loop through HTML tags, stopping once the snippet budget is used up
+    for tag in tree.iter("p", "li", "div"):
+        text = tag.text_content().strip()
+        if text and KEYWORD_RE.search(text):
+            if length + len(text) + 1 > SNIPPET_CHARS:
+                if not relevant_lines:
+                    relevant_lines.append(text[:SNIPPET_CHARS])
+                break
+            relevant_lines.append(text)
+            length += len(text) + 1
 
-    # Loop through HTML tags
-    for tag in text_blocks:
-        if tag.text:
-            text = tag.text.strip()
-            text_lower = text.lower()
-            if any(keyword in text_lower for keyword in ["camp", "date", "session", "ages", "$", "–", "to", "through"]) or any(char.isdigit() for char in text_lower):
-                relevant_lines.append(text)
+    return "\n".join(relevant_lines)
 
-    snippet = "\n".join(relevant_lines)[:5000]  # Truncate to safe token length
-    # row["LLM_INPUT"] = snippet
+
+def call_llm(snippet):
+    """Send a snippet to OpenRouter and return the parsed JSON. Raises on request or parse failures."""
+    # The prompt only accepts a camp with the word camp and a date, so pages missing either are skipped
+    if "camp" not in snippet.lower() or not DATE_RE.search(snippet):
+        print("⚠️ No camp or dates in page text; skipping LLM call")
+        return []
 
     # Call OpenRouter API to extract structured info
     OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -128,91 +196,126 @@ def get_llm_data(res, camp):
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json"
     }
+    model = "google/gemma-3n-e4b-it:free"
     payload = {
-       "model": "google/gemma-3n-e4b-it:free",
+       "model": model,
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.2
     }
+    cache_key = llm_cache.make_key(PROMPT_VERSION, model, snippet)
 
-    addl_camps = []
+    parsed = llm_cache.get(cache_key)
+    if parsed is not None:
+        print("✅ Using cached LLM result")
+        return parsed
 
-    try:
-        llm_resp = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers_llm, data=json.dumps(payload))
-        llm_json = llm_resp.json()
-        #print("🔍 LLM JSON:", llm_json)
-        if "choices" in llm_json and llm_json["choices"]:
-            llm_output = llm_json["choices"][0]["message"]["content"]
-        else:
-            raise ValueError("No 'choices' in LLM response")
-        print("🔍 LLM Output:", llm_output)
-
-        if llm_output.startswith("```"):
-            llm_output = llm_output.strip("`").strip()
-
-        json_start = llm_output.find('[')
-        if json_start == -1:
-            raise ValueError("No '[' found in LLM output")
+    llm_resp = SESSION.post("https://openrouter.ai/api/v1/chat/completions", headers=headers_llm, data=orjson.dumps(payload))
+    llm_json = orjson.loads(llm_resp.content)
+    #print("🔍 LLM JSON:", llm_json)
+    if "choices" in llm_json and llm_json["choices"]:
+        llm_output = llm_json["choices"][0]["message"]["content"]
+    else:
+        raise ValueError("No 'choices' in LLM response")
+    print("🔍 LLM Output:", llm_output)
 
-        json_snippet = llm_output[json_start:]
+    if llm_output.startswith("```"):
+        llm_output = llm_output.strip("`").strip()
 
+    try:
+        # Replies that are bare JSON decode straight away with orjson
+        parsed = orjson.loads(llm_output)
+    except ValueError:
+        # Decode once from the first '[' or '{'; any trailing note from the model is ignored
+        starts = [i for i in (llm_output.find('['), llm_output.find('{')) if i != -1]
+        if not starts:
+            raise ValueError("No JSON found in LLM output")
         try:
-            parsed = json.loads(json_snippet)
+            parsed, _ = json.JSONDecoder().raw_decode(llm_output, min(starts))
             print("✅ Parsed LLM JSON")
         except json.JSONDecodeError as e:
             print("❌ Still malformed JSON:", e)
-            print("🚨 Partial content:", json_snippet[:500])
-        try:
-            # If we got a list with at least one item, we can update the camp
-            if isinstance(parsed, list) and len(parsed) > 0:
-                camp["Camp Found?"] = "Yes"
-                camp.update({
-                    "Event Details": parsed[0].get("event_name", camp.get("Event Details")),
-                    "start_date": parsed[0].get("start_date", ""),
-                    "end_date": parsed[0].get("end_date", ""),
-                    "Ages / Grade Level": parsed[0].get("ages", ""),
-                    "Cost": parsed[0].get("cost", "")
-                })
-                # Update additional camps with valid data
-                for camp_obj in parsed[1:]:
-                    new_camp = copy.deepcopy(camp)
-                    new_camp.update({
-                        "Event Details": camp_obj.get("event_name", camp.get("Event Details")),
-                        "start_date": camp_obj.get("start_date", ""),
-                        "end_date": camp_obj.get("end_date", ""),
-                        "Ages / Grade Level": camp_obj.get("ages", ""),
-                        "Cost": camp_obj.get("cost", "")
-                    })
-                    addl_camps.append(new_camp)
-            else:
-                camp["Camp Found?"] = "No"
-                print("⚠️ No camps found in LLM output")
-                return
-        except json.JSONDecodeError as e:
-            print("❌ JSON decode error:", e)
-    except Exception as e:
-        print("⚠️ LLM Parsing Error:", e)
-        camp["start_date"] = camp["end_date"] = camp["Ages / Grade Level"] = camp["Cost"] = "LLM Error"
-    
+            print("🚨 Partial content:", llm_output[min(starts):][:500])
+            raise
+    # The prompt's example format is a single object; an all-empty one means no camp was found
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    if not isinstance(parsed, list):
+        raise ValueError("Expected a list of camps in LLM output")
+    # Only well-formed results are cached, so a bad reply is retried on the next run
+    parsed = [c for c in parsed if isinstance(c, dict) and any(c.values())]
+    llm_cache.put(cache_key, parsed, model=model)
+    return parsed
+
+
+def apply_llm_data(camp, parsed):
+    """Copy the first extracted camp onto camp and return the rest as new camp rows."""
+    addl_camps = []
+    # If we got a list with at least one item, we can update the camp
+    if isinstance(parsed, list) and len(parsed) > 0:
+        camp["Camp Found?"] = "Yes"
+        camp.update({
+            "Event Details": parsed[0].get("event_name", camp.get("Event Details")),
+            "start_date": parsed[0].get("start_date", ""),
+            "end_date": parsed[0].get("end_date", ""),
+            "Ages / Grade Level": parsed[0].get("ages", ""),
+            "Cost": parsed[0].get("cost", "")
+        })
+        # Update additional camps with valid data
+        for camp_obj in parsed[1:]:
+            new_camp = camp.copy()
+            new_camp.update({
+                "Event Details": camp_obj.get("event_name", camp.get("Event Details")),
+                "start_date": camp_obj.get("start_date", ""),
+                "end_date": camp_obj.get("end_date", ""),
+                "Ages / Grade Level": camp_obj.get("ages", ""),
+                "Cost": camp_obj.get("cost", "")
+            })
+            addl_camps.append(new_camp)
+    else:
+        camp["Camp Found?"] = "No"
+        print("⚠️ No camps found in LLM output")
     return addl_camps
 
+
+def mark_llm_error(camp, e):
+    print("⚠️ LLM Error:", e)
+    camp["start_date"] = camp["end_date"] = camp["Ages / Grade Level"] = camp["Cost"] = "LLM Error"
+
+
+def mark_parse_error(camp, e):
+    print(f"⚠️ Could not parse {camp['Camp Info URL']}: {e}")
+    camp["Page Load?"] = f"Parse Error: {e}"
+
+
+def get_llm_data(res, camp):
+    try:
+        snippet = build_snippet(res)
+    except PAGE_PARSE_ERRORS as e:
+        mark_parse_error(camp, e)
+        return []
+    # row["LLM_INPUT"] = snippet
+    try:
+        return apply_llm_data(camp, call_llm(snippet))
+    except LLM_PARSE_ERRORS as e:
+        mark_llm_error(camp, e)
+        return []
+
 # Main execution
 def setup():
     data = []
     for url in URLS:
         camp_limit = None
         gender = "Women" if "womens" in url else "Men"
-        res = requests.get(url)
+        res = SESSION.get(url)
         tree = html.fromstring(res.content)
         table = tree.xpath(XPATH)[0]
-        rows = table.xpath(".//tr")
-        num_camps_filled = 0
+        rows = TR_XPATH(table)
+        camps = []
         for i, row in enumerate(rows):
-            if camp_limit and num_camps_filled >= camp_limit:
-                break
-            cells = row.xpath(".//td")
+            cells = TD_XPATH(row)
             if len(cells) == 2:
                 state = cells[0].text_content().strip()
-                camp_el = cells[1].xpath(".//a")
+                camp_el = A_XPATH(cells[1])
                 camp_host = cells[1].text_content().strip()
                 if camp_host.endswith("Camp"):
                     camp_host = camp_host[:-len("Camp")].strip()
@@ -237,22 +340,55 @@ def setup():
                     "Cost":"",
                     "Gender": gender
                 }
-                addl_camps = []
-                addl_camps = fill_columns(camp)
-                if camp["Page Load?"] != "OK":
-                    print(f"❌ Skipping camp due to page load error")
-                    continue
+                camps.append(camp)
+        # Apply the limit before dispatching so the skipped camps cost no requests or LLM calls
+        if camp_limit:
+            camps = camps[:camp_limit]
+
+        # Fetch all camp pages concurrently; the pool size caps how many requests are in flight
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            responses = list(executor.map(fetch_camp_page, camps))
+        # A page that can't be parsed only costs its own row, which keeps the parse error
+        loaded = []
+        for camp, res in zip(camps, responses):
+            if res is None:
+                continue
+            try:
+                loaded.append((camp, build_snippet(res)))
+            except PAGE_PARSE_ERRORS as e:
+                mark_parse_error(camp, e)
                 data.append(camp)
-                num_camps_filled += 1
-                if addl_camps:
-                    num_camps_filled += len(addl_camps)
-                    data.extend(addl_camps)
+        snippets = [snippet for _, snippet in loaded]
+
+        # The LLM round-trips are the slowest step, so run them concurrently too. Camps that
+        # share a page share a snippet, so each distinct snippet is only sent once
+        with ThreadPoolExecutor(max_workers=LLM_WORKERS) as executor:
+            by_snippet = {snippet: executor.submit(call_llm, snippet) for snippet in dict.fromkeys(snippets)}
+        futures = [by_snippet[snippet] for snippet in snippets]
+
+        num_camps_filled = 0
+        for (camp, _), future in zip(loaded, futures):
+            if camp_limit and num_camps_filled >= camp_limit:
+                break
+            try:
+                addl_camps = apply_llm_data(camp, future.result())
+            except LLM_CALL_ERRORS as e:
+                mark_llm_error(camp, e)
+                addl_camps = []
+            data.append(camp)
+            num_camps_filled += 1
+            if addl_camps:
+                num_camps_filled += len(addl_camps)
+                data.extend(addl_camps)
+
+    return data
 
 
 
-def token_jaccard(a: str, b: str) -> float:
-    a_tokens = set(re.findall(r"\w+", a.lower()))
-    b_tokens = set(re.findall(r"\w+", b.lower()))
+def word_tokens(s: str) -> set:
+    return set(WORD_RE.findall(s.lower()))
+
+def token_jaccard(a_tokens: set, b_tokens: set) -> float:
     if not a_tokens or not b_tokens:
         return 0.0
     return len(a_tokens & b_tokens) / len(a_tokens | b_tokens)
@@ -287,16 +423,16 @@ def scrape_table_to_json(urls=URLS, xpath=XPATH, output_json='camp_url_school_ma
                 print(f"No table found on {page_url} using xpath {xpath}")
                 continue
             table = table_el[0]
-            rows = table.xpath('.//tr')
+            rows = TR_XPATH(table)
         except Exception as e:
             print(f"Failed to parse table on {page_url}: {e}")
             continue
 
         for row in rows:
-            cells = row.xpath('.//td')
+            cells = TD_XPATH(row)
             if len(cells) < 2:
                 continue
-            a_el = cells[1].xpath('.//a')
+            a_el = A_XPATH(cells[1])
             if not a_el:
                 # no anchor in the second cell; skip
                 continue
@@ -319,8 +455,8 @@ def scrape_table_to_json(urls=URLS, xpath=XPATH, output_json='camp_url_school_ma
 
     # write JSON array
     try:
-        with open(output_json, 'w', encoding='utf-8') as fh:
-            json.dump(results, fh, ensure_ascii=False, indent=2)
+        with open(output_json, 'wb') as fh:
+            fh.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
         print(f"Scraped {len(results)} camps and wrote to {output_json}")
     except Exception as e:
         print(f"Failed to write JSON to {output_json}: {e}")
@@ -336,8 +472,8 @@ def match_schools_from_sheet(json_path='camp_url_school_map.json', uni_tab='Univ
     """
     # Load camp entries
     try:
-        with open(json_path, 'r', encoding='utf-8') as fh:
-            camps = json.load(fh)
+        with open(json_path, 'rb') as fh:
+            camps = orjson.loads(fh.read())
     except Exception as e:
         print(f"Failed to load {json_path}: {e}")
         return []
@@ -345,7 +481,7 @@ def match_schools_from_sheet(json_path='camp_url_school_map.json', uni_tab='Univ
     # Load university names from sheet
     uni_names = []
     try:
-        uni_ws = client.open_by_key(SHEET_ID).worksheet(uni_tab)
+        uni_ws = get_client().open_by_key(SHEET_ID).worksheet(uni_tab)
         # Prefer header search for a column containing 'university' or 'school'
         vals = uni_ws.get_all_values()
         if vals and len(vals) > 0:
@@ -384,6 +520,9 @@ def match_schools_from_sheet(json_path='camp_url_school_map.json', uni_tab='Univ
         print("No university names found in sheet - aborting matching step.")
         return camps
 
+    # Prepare each university once: its lowercased name and its word tokens
+    uni_prepared = [(uni, uni.lower(), word_tokens(uni)) for uni in uni_names]
+
     # perform matching
     updated = []
     for entry in camps:
@@ -391,9 +530,12 @@ def match_schools_from_sheet(json_path='camp_url_school_map.json', uni_tab='Univ
         best_name = ''
         best_score = 0.0
         if camp_name:
-            for uni in uni_names:
-                seq = SequenceMatcher(None, camp_name.lower(), uni.lower()).ratio()
-                jacc = token_jaccard(camp_name, uni)
+            camp_lower = camp_name.lower()
+            camp_tokens = word_tokens(camp_name)
+            for uni, uni_lower, uni_tokens in uni_prepared:
+                # rapidfuzz's C++ edit-distance ratio, scaled to 0..1
+                seq = fuzz.ratio(camp_lower, uni_lower, processor=None) / 100
+                jacc = token_jaccard(camp_tokens, uni_tokens)
                 score = 0.4 * seq + 0.6 * jacc
                 if score > best_score:
                     best_score = score
@@ -405,8 +547,8 @@ def match_schools_from_sheet(json_path='camp_url_school_map.json', uni_tab='Univ
 
     # write back
     try:
-        with open(json_path, 'w', encoding='utf-8') as fh:
-            json.dump(updated, fh, ensure_ascii=False, indent=2)
+        with open(json_path, 'wb') as fh:
+            fh.write(orjson.dumps(updated, option=orjson.OPT_INDENT_2))
         print(f"Updated {len(updated)} camp entries with best university matches and wrote to {json_path}")
     except Exception as e:
         print(f"Failed to write updated JSON to {json_path}: {e}")
@@ -420,8 +562,8 @@ def print_lowest_similarity(json_path='camp_url_school_map.json', n=30):
     Skip any entries where 'manually_confirmed' is set to True (or truthy string values).
     """
     try:
-        with open(json_path, 'r', encoding='utf-8') as fh:
-            camps = json.load(fh)
+        with open(json_path, 'rb') as fh:
+            camps = orjson.loads(fh.read())
     except Exception as e:
         print(f"Failed to load {json_path}: {e}")
         return
@@ -469,15 +611,30 @@ def main():
     # NOTE: The original sheet-update workflow that processed the existing sheet rows
     # is intentionally preserved here as a commented block. If you want to restore that
     # behavior, uncomment the block below and remove the build_camp_url_school_map() call.
+    # The block is a string literal and never runs: its single DataFrame rebuild, one-time duplicate
+    # key set, per-URL result reuse and record-level writes are untested until it is re-enabled.
     '''
     # Load existing sheet data into a DataFrame
-    existing_data = pd.DataFrame(sheet.get_all_records()).head(6)
+    existing_data = pd.DataFrame(get_sheet().get_all_records()).head(6)
 
     # Array to store rows with page load errors
     error_rows = []
-
-    # Iterate through rows and update relevant columns
-    for index, row in existing_data.iterrows():
+    error_indices = set()
+    # Camps found on a row's page, keyed by that row's index; inserted below it once the loop is done
+    new_rows = {}
+
+    records = existing_data.to_dict("records")
+    # Keys used to skip duplicate camps; built once and extended as new camps are accepted
+    existing_camp_keys = set(
+        (row["Organiser"], row["Camp Info URL"], row["Event Details"], row["start_date"]) for row in records
+    )
+
+    # Several rows can share a camp URL; each page is fetched and sent to the LLM once
+    # and the result is reused for the other rows in its group
+    filled_by_url = {}
+
+    # Iterate through a snapshot of the rows and update relevant columns
+    for index, row in enumerate(records):
         camp = {
             "Organiser": row["Organiser"],
             "Camp Info URL": row["Camp Info URL"],
@@ -487,18 +644,22 @@ def main():
             "Ages / Grade Level": row["Ages / Grade Level"],
             "Cost": row["Cost"]
         }
-        addl_camps = fill_columns(camp)
+        url = camp["Camp Info URL"]
+        if url and url in filled_by_url:
+            filled, found = filled_by_url[url]
+            camp.update({k: v for k, v in filled.items() if k != "Organiser"})
+            if camp["Page Load?"] == "OK":
+                # Location comes from the organiser, not the page
+                camp["Lat"], camp["Long"], camp["City"] = get_lat_long(camp["Organiser"])
+            addl_camps = [dict(c, Organiser=camp["Organiser"]) for c in found]
+        else:
+            addl_camps = fill_columns(camp)
+            if url:
+                filled_by_url[url] = (camp, addl_camps)
         if camp["Page Load?"] == "OK":
-            # Update the DataFrame with new values
-            existing_data.at[index, "start_date"] = camp["start_date"]
-            existing_data.at[index, "end_date"] = camp["end_date"]
-            existing_data.at[index, "Ages / Grade Level"] = camp["Ages / Grade Level"]
-            existing_data.at[index, "Cost"] = camp["Cost"]
-
-            # Check for duplicates before adding new camps
-            existing_camp_keys = set(
-                (row["Organiser"], row["Camp Info URL"], row["Event Details"], row["start_date"]) for _, row in existing_data.iterrows()
-            )
+            # Update the row's record; the DataFrame is rebuilt from the records once after the loop
+            for col in ("start_date", "end_date", "Ages / Grade Level", "Cost"):
+                row[col] = camp[col]
 
             # Add additional camps as new rows directly below the current row
             if addl_camps:
@@ -513,29 +674,34 @@ def main():
                             "State": camp.get("State", ""),
                             "Gender": camp.get("Gender", "")
                         })
-                        # Insert new rows directly below the current row
-                        existing_data = pd.concat(
-                            [existing_data.iloc[:index + 1], pd.DataFrame([new_camp]), existing_data.iloc[index + 1:]], # type: ignore
-                            ignore_index=True
-                        )
+                        new_rows.setdefault(index, []).append(new_camp)
                         existing_camp_keys.add(new_camp_key)
         else:
             # Add row to error_rows and mark for removal
             error_rows.append(row)
-            existing_data.drop(index, inplace=True)
+            error_indices.add(index)
+
+    # Rebuild the DataFrame once: kept rows, each followed by the new camps found on its page
+    output_rows = []
+    for index, row in enumerate(records):
+        if index in error_indices:
+            continue
+        output_rows.append(row)
+        output_rows.extend(new_rows.get(index, []))
+    existing_data = pd.DataFrame(output_rows)
 
     # Write back updated rows to the original sheet
     existing_data = existing_data.replace({pd.NA: "", float("inf"): "", float("nan"): ""})
     existing_data = existing_data.fillna("")
-    sheet.update([existing_data.columns.tolist()] + existing_data.values.tolist())
+    get_sheet().update([existing_data.columns.tolist()] + existing_data.values.tolist())
 
     # Write error rows to a new sheet tab
     if error_rows:
         try:
-            error_sheet = client.open_by_key(SHEET_ID).worksheet("Page Load Errors")
+            error_sheet = get_client().open_by_key(SHEET_ID).worksheet("Page Load Errors")
         except gspread.exceptions.WorksheetNotFound:
             print("⚠️ Worksheet 'Page Load Errors' not found. Creating it...")
-            error_sheet = client.open_by_key(SHEET_ID).add_worksheet(title="Page Load Errors", rows=100, cols=20)
+            error_sheet = get_client().open_by_key(SHEET_ID).add_worksheet(title="Page Load Errors", rows=100, cols=20)
 
         error_df = pd.DataFrame(error_rows)
         error_sheet.update([error_df.columns.tolist()] + error_df.values.tolist())
@@ -0,0 +1,73 @@
+import ast
+import html
+import re
+import threading
+from pathlib import Path
+
+import pytest
+
+
+def load_collegedata_scraper():
+    """Load collegedata_scraper.py's constants and functions without its HTTP session or Sheets setup."""
+    pytest.importorskip("lxml")
+    from lxml import etree, html as lxml_html
+
+    tree = ast.parse(Path("collegedata_scraper.py").read_text())
+    skipped = {"SESSION", "_retry", "_adapter"}
+    body = [
+        n for n in tree.body
+        if isinstance(n, ast.FunctionDef)
+        or (isinstance(n, ast.Assign) and getattr(n.targets[0], "id", None) not in skipped)
+    ]
+    code = compile(ast.Module(body=body, type_ignores=[]), filename="collegedata_scraper.py", mode="exec")
+    namespace = {"re": re, "html": html, "threading": threading, "etree": etree, "lxml_html": lxml_html, "__name__": "collegedata_scraper"}
+    exec(code, namespace)
+    return namespace
+
+
+def tv(title, value):
+    return f'<div class="TitleValue_title__2-afK">{title}</div>\n<div class="TitleValue_value__1JT0d">{value}</div>'
+
+
+def page(*pairs, stat="12,345  undergraduates"):
+    return (
+        "<html><body>"
+        f'<div class="StatBlock_body__3x6Pr">{stat}</div>'
+        + "".join(f"<div>{tv(t, v)}</div>" for t, v in pairs)
+        + "</body></html>"
+    ).encode("utf-8")
+
+
+def test_fast_page_text_reads_plain_markup():
+    cd = load_collegedata_scraper()
+    body = page(("In-State Tuition", "$10,000"), ("Average GPA", "3.75 &amp; up"))
+
+    stat_text, pairs = cd["_fast_page_text"](body)
+    assert stat_text == "12,345 undergraduates"
+    assert pairs == [("In-State Tuition", "$10,000"), ("Average GPA", "3.75 & up")]
+    # The regex path must agree with the full lxml walk it stands in for
+    assert cd["_lxml_page_text"](body) == (stat_text, pairs)
+
+
+def test_fast_page_text_defers_to_lxml_on_nested_markup():
+    cd = load_collegedata_scraper()
+    nested = page(("In-State Tuition", "<span>$10,000</span>"))
+    assert cd["_fast_page_text"](nested) is None
+
+    non_ascii = page(("Tuition", "10 000 €"))
+    assert cd["_fast_page_text"](non_ascii) is None
+
+    no_stat = page(("In-State Tuition", "$10,000")).replace(b"StatBlock_body__3x6Pr", b"Other")
+    assert cd["_fast_page_text"](no_stat) is None
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.collegedata.com/college-search/x", "https://waf.collegedata.com/college-search/x"),
+    ("http://collegedata.com/college-search/x", "https://waf.collegedata.com/college-search/x"),
+    ("collegedata.com/college-search/x", "https://waf.collegedata.com/college-search/x"),
+    ("https://waf.collegedata.com/college-search/x", "https://waf.collegedata.com/college-search/x"),
+    ("https://example.com/collegedata.com", "https://example.com/collegedata.com"),
+])
+def test_to_waf(url, expected):
+    cd = load_collegedata_scraper()
+    assert cd["_to_waf"](url) == expected
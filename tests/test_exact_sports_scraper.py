@@ -0,0 +1,43 @@
+import ast
+import types
+from pathlib import Path
+
+import pytest
+
+
+def load_get_camp_data_http(body):
+    """Load get_camp_data_http from exact_sports_scraper.py with a stub session returning body with a 200."""
+    pytest.importorskip("lxml")
+    from lxml import etree, html as lxml_html
+
+    tree = ast.parse(Path("exact_sports_scraper.py").read_text())
+    names = {"GRADES_XPATH", "COST_XPATH", "ADDRESS_XPATH", "CAMP_FIELD_XPATHS", "CAMP_HTML_PARSER"}
+    body_nodes = [
+        n for n in tree.body
+        if (isinstance(n, ast.FunctionDef) and n.name in {"_normalize_field_text", "get_camp_data_http"})
+        or (isinstance(n, ast.Assign) and getattr(n.targets[0], "id", None) in names)
+    ]
+    code = compile(ast.Module(body=body_nodes, type_ignores=[]), filename="exact_sports_scraper.py", mode="exec")
+
+    class DummySession:
+        def get(self, url, timeout):
+            return types.SimpleNamespace(content=body, raise_for_status=lambda: None)
+
+    namespace = {
+        "etree": etree,
+        "lxml_html": lxml_html,
+        "requests": types.SimpleNamespace(RequestException=OSError),
+        "SESSION": DummySession(),
+    }
+    exec(code, namespace)
+    return namespace["get_camp_data_http"]
+
+
+@pytest.mark.parametrize("body", [b"", b"   ", b"<!-- x -->"])
+def test_empty_page_falls_back_to_browser(body):
+    assert load_get_camp_data_http(body)("https://example.com/camp") is None
+
+
+def test_page_missing_fields_falls_back_to_browser():
+    body = b"<html><body><p>Camp details load with JavaScript</p></body></html>"
+    assert load_get_camp_data_http(body)("https://example.com/camp") is None
@@ -4,14 +4,23 @@ import types
 from pathlib import Path
 
 
-def load_get_llm_data(openrouter_response):
-    """Load get_llm_data from camp_scraper.py with stub dependencies."""
+def load_get_llm_data(openrouter_response, cached=None):
+    """Load get_llm_data from camp_scraper.py with stub dependencies.
+
+    Returns the function and a namespace recording the OpenRouter posts and cache writes it made.
+    """
     source = Path("camp_scraper.py").read_text()
     tree = ast.parse(source)
     node = next(n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == "get_llm_data")
-    mod = ast.Module(body=[node], type_ignores=[])
+    constants = [
+        n for n in tree.body
+        if isinstance(n, ast.Assign) and getattr(n.targets[0], "id", None) in {"DATE_RE", "LLM_PARSE_RETRIES", "_CAMP_FIELDS", "CAMP_RESPONSE_FORMAT", "CAMP_SYSTEM_PROMPT"}
+    ]
+    mod = ast.Module(body=constants + [node], type_ignores=[])
     code = compile(mod, filename="camp_scraper.py", mode="exec")
 
+    calls = types.SimpleNamespace(posts=[], cache_puts=[])
+
     class DummyTag:
         def __init__(self, text):
             self.text = text
@@ -20,74 +29,104 @@ def load_get_llm_data(openrouter_response):
         def __init__(self, text):
             self.text = text
 
-        def find_all(self, names):
+        def find_all(self, *names):
             import re
             pattern = re.compile(r"<(?:p|li|div)[^>]*>(.*?)</(?:p|li|div)>", re.S | re.I)
             return [DummyTag(m.group(1)) for m in pattern.finditer(self.text)]
 
-    def bs(text, parser):
-        return DummySoup(text)
+        def select(self, selector):
+            return self.find_all()
 
-    class DummyRequests:
-        def __init__(self, resp):
-            self.resp = resp
+    def bs(markup, parser):
+        return DummySoup(markup.decode() if isinstance(markup, bytes) else markup)
 
+    class DummySession:
         def post(self, *args, **kwargs):
-            return types.SimpleNamespace(json=lambda: self.resp)
+            calls.posts.append(json.loads(kwargs["data"]))
+            return types.SimpleNamespace(content=json.dumps(openrouter_response).encode())
 
     namespace = {
         "BeautifulSoup": bs,
-        "requests": DummyRequests(openrouter_response),
+        "SESSION": DummySession(),
         "json": json,
-        "copy": __import__("copy"),
+        "orjson": types.SimpleNamespace(loads=json.loads, dumps=lambda obj: json.dumps(obj).encode()),
         "os": __import__("os"),
+        "re": __import__("re"),
+        "time": types.SimpleNamespace(sleep=lambda seconds: None),
+        "llm_cache": types.SimpleNamespace(
+            make_key=lambda *parts: "key",
+            get=lambda key: cached,
+            put=lambda key, value, model="": calls.cache_puts.append((key, value)),
+        ),
+        "PROMPT_VERSION": "v3",
+        "SNIPPET_CHARS": 5000,
     }
     exec(code, namespace)
-    return namespace["get_llm_data"]
+    return namespace["get_llm_data"], calls
+
+
+def llm_reply(content):
+    return {"choices": [{"message": {"content": content}}]}
+
+
+PAGE = types.SimpleNamespace(content=b"<p>camp info June 1</p>")
 
 
 def test_valid_json_parses_fields():
     valid = "[{\"event_name\": \"Test Camp\", \"start_date\": \"2024-06-01\", \"end_date\": \"2024-06-03\", \"ages\": \"10-18\", \"cost\": \"$100\"}]"
-    func = load_get_llm_data({"choices": [{"message": {"content": valid}}]})
-
-    response = types.SimpleNamespace(text="<p>camp info</p>")
-    camp = {
-        "Camp Info URL": "http://example.com",
-        "Camp Found?": "",
-        "Event Details": "",
-        "start_date": "",
-        "end_date": "",
-        "Ages / Grade Level": "",
-        "Cost": "",
-    }
-    addl = func(response, camp)
-    assert addl == []
+    func, calls = load_get_llm_data(llm_reply(valid))
+
+    camps = func(PAGE)
+    assert len(camps) == 1
+    camp = camps[0]
     assert camp["Camp Found?"] == "Yes"
     assert camp["Event Details"] == "Test Camp"
     assert camp["start_date"] == "2024-06-01"
     assert camp["end_date"] == "2024-06-03"
     assert camp["Ages / Grade Level"] == "10-18"
     assert camp["Cost"] == "$100"
+    assert len(calls.posts) == 1
+    assert calls.cache_puts == [("key", json.loads(valid))]
+
+
+def test_schema_wrapped_camps_are_unwrapped():
+    reply = {"camps": [
+        {"event_name": "Day Camp", "address": "", "start_date": "June 1", "end_date": "June 2", "ages": "", "cost": ""},
+        {"event_name": "", "address": "", "start_date": "", "end_date": "", "ages": "", "cost": ""},
+        {"event_name": "Elite Camp", "address": "", "start_date": "July 1", "end_date": "July 3", "ages": "", "cost": "$300"},
+    ]}
+    func, calls = load_get_llm_data(llm_reply(json.dumps(reply)))
+
+    camps = func(PAGE, "p")
+    # The all-empty object means "no camp" and is dropped
+    assert [c["Event Details"] for c in camps] == ["Day Camp", "Elite Camp"]
+    assert camps[1]["Cost"] == "$300"
+    assert calls.posts[0]["response_format"]["type"] == "json_schema"
 
 
 def test_malformed_json_returns_empty():
     malformed = "[{'event_name':'Camp'}]"
-    func = load_get_llm_data({"choices": [{"message": {"content": malformed}}]})
-
-    response = types.SimpleNamespace(text="<p>camp info</p>")
-    camp = {
-        "Camp Info URL": "http://example.com",
-        "Camp Found?": "",
-        "Event Details": "",
-        "start_date": "",
-        "end_date": "",
-        "Ages / Grade Level": "",
-        "Cost": "",
-    }
-    addl = func(response, camp)
-    assert addl == []
-    assert camp["start_date"] == "LLM Error"
-    assert camp["end_date"] == "LLM Error"
-    assert camp["Ages / Grade Level"] == "LLM Error"
-    assert camp["Cost"] == "LLM Error"
+    func, calls = load_get_llm_data(llm_reply(malformed))
+
+    assert func(PAGE) == []
+    # The model is re-prompted with the parse error before the page is given up on
+    assert len(calls.posts) == 3
+    assert "error" in calls.posts[-1]["messages"][-1]["content"]
+    assert calls.cache_puts == []
+
+
+def test_cached_result_skips_llm_call():
+    cached = [{"event_name": "Cached Camp", "start_date": "2024-06-01", "end_date": "", "ages": "", "cost": ""}]
+    func, calls = load_get_llm_data(llm_reply("[]"), cached=cached)
+
+    camps = func(PAGE)
+    assert [c["Event Details"] for c in camps] == ["Cached Camp"]
+    assert calls.posts == []
+    assert calls.cache_puts == []
+
+
+def test_page_without_dates_skips_llm_call():
+    func, calls = load_get_llm_data(llm_reply("[]"))
 
+    assert func(types.SimpleNamespace(content=b"<p>camp info coming soon</p>")) == []
+    assert calls.posts == []
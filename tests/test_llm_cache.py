@@ -0,0 +1,37 @@
+import os
+
+import llm_cache
+
+
+def test_make_key_separates_parts():
+    assert llm_cache.make_key("ab", "c") != llm_cache.make_key("a", "bc")
+    assert llm_cache.make_key("v1", "model", "snippet") == llm_cache.make_key("v1", "model", "snippet")
+    assert len(llm_cache.make_key("x")) == 64
+
+
+def test_put_then_get_round_trips(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "CACHE_DIR", str(tmp_path / "llm_cache"))
+    key = llm_cache.make_key("v1", "model", "snippet")
+    value = [{"event_name": "Camp", "start_date": "June 1"}]
+
+    assert llm_cache.get(key) is None
+    llm_cache.put(key, value, model="model")
+    assert llm_cache.get(key) == value
+    assert os.listdir(llm_cache.CACHE_DIR) == [f"{key}.json"]
+
+
+def test_unreadable_entry_is_a_miss(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "CACHE_DIR", str(tmp_path))
+    (tmp_path / "key.json").write_bytes(b"not json")
+    assert llm_cache.get("key") is None
+
+
+def test_failed_write_removes_temp_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "CACHE_DIR", str(tmp_path))
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(llm_cache.os, "replace", fail_replace)
+    llm_cache.put("key", [])
+    assert os.listdir(tmp_path) == []